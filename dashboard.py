@@ -9,9 +9,11 @@ Run with: streamlit run dashboard.py
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from concurrent.futures import ThreadPoolExecutor
 import os
 
 # Page config
@@ -40,15 +42,220 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load data
-@st.cache_data
+# Columns referenced by the dashboard tabs
+DASHBOARD_COLUMNS = [
+    'route_code', 'unlock_datetime', 'lock_datetime', 'CycleType', 'time_period',
+    'duration_minutes_calculated', 'length', 'costs', 'cyclenumber',
+    'startstationname', 'endstationname', 'unlock_hour', 'unlock_dayofweek'
+]
+
+# Load data (cache_resource shares one frame across reruns instead of
+# unpickling a copy per call; callers only read it)
+@st.cache_resource
 def load_data():
-    """Load cleaned data"""
-    routes = pd.read_csv('processed_data/routes_cleaned.csv')
-    routes['unlock_datetime'] = pd.to_datetime(routes['unlock_datetime'])
-    routes['lock_datetime'] = pd.to_datetime(routes['lock_datetime'])
+    """Load cleaned data (Feather snapshot keeps datetime and categorical dtypes)"""
+    routes = pd.read_feather('processed_data/routes_cleaned.feather', columns=DASHBOARD_COLUMNS, use_threads=True)
     return routes
 
+
+# Cached filtering and aggregation helpers
+# (keyed by the hashable filter tuple, never by the DataFrame itself;
+# filters=None means no filter is active and the aggregates precomputed
+# by 01_data_preprocessing.py are loaded instead of recomputed)
+CORR_FEATURES = ['duration_minutes_calculated', 'length', 'costs', 'unlock_hour']
+
+
+@st.cache_data
+def load_aggregate(name):
+    """Load an aggregate precomputed on the unfiltered data"""
+    return pd.read_parquet(f'processed_data/agg_{name}.parquet')
+
+
+# Not cached itself: every caller is already cached on the same filter tuple
+def get_filtered(bike_type, time_period, date_lo, date_hi):
+    """Return routes matching the sidebar filters"""
+    routes = load_data()
+
+    # Date range on the raw datetime64[ns] values
+    unlock = routes['unlock_datetime'].to_numpy()
+    mask = (unlock >= np.datetime64(pd.Timestamp(date_lo))) & \
+           (unlock < np.datetime64(pd.Timestamp(date_hi) + pd.Timedelta(days=1)))
+
+    # Categorical filters compare integer codes instead of strings
+    for column, value in (('CycleType', bike_type), ('time_period', time_period)):
+        if value != 'All':
+            values = routes[column].cat
+            mask &= values.codes.to_numpy() == values.categories.get_loc(value)
+
+    return routes.iloc[np.flatnonzero(mask)]
+
+
+@st.cache_data
+def key_metrics(filters):
+    """Trip count, averages and bike/station cardinalities"""
+    routes = load_data() if filters is None else get_filtered(*filters)
+    cardinalities = routes[['cyclenumber', 'startstationname']].nunique()
+    return {
+        'trips': len(routes),
+        'avg_duration': routes['duration_minutes_calculated'].mean(),
+        'avg_distance': routes['length'].mean(),
+        'unique_bikes': int(cardinalities['cyclenumber']),
+        'unique_stations': int(cardinalities['startstationname'])
+    }
+
+
+@st.cache_data
+def hourly_counts(filters):
+    """Trips per unlock hour"""
+    if filters is None:
+        return load_aggregate('hourly')
+    return get_filtered(*filters).groupby('unlock_hour', sort=False).size().reset_index(name='count')
+
+
+@st.cache_data
+def daily_counts(filters):
+    """Trips per day of week"""
+    if filters is None:
+        return load_aggregate('daily')
+    return get_filtered(*filters).groupby('unlock_dayofweek', sort=False).size().reset_index(name='count')
+
+
+@st.cache_data
+def time_period_summary(filters):
+    """Trip count, average duration and distance per time period"""
+    if filters is None:
+        return load_aggregate('time_periods')
+    return get_filtered(*filters).groupby('time_period', observed=True, sort=True).agg({
+        'route_code': 'count',
+        'duration_minutes_calculated': 'mean',
+        'length': 'mean'
+    }).reset_index()
+
+
+@st.cache_data
+def top_stations(filters):
+    """Top 10 start and end stations"""
+    if filters is None:
+        return load_aggregate('top_startstationname')['count'], load_aggregate('top_endstationname')['count']
+    filtered = get_filtered(*filters)
+    # Bincount over category codes + nlargest avoids hashing and sorting every station
+    counts = []
+    for col in ['startstationname', 'endstationname']:
+        values = filtered[col].cat
+        codes = values.codes.to_numpy()
+        counts.append(pd.Series(np.bincount(codes[codes >= 0], minlength=len(values.categories)),
+                                index=pd.Index(values.categories, name=col), name='count').nlargest(10))
+    return tuple(counts)
+
+
+@st.cache_data
+def top_routes_summary(filters):
+    """Top 10 start → end station pairs"""
+    if filters is None:
+        return load_aggregate('top_routes')
+    top_routes = get_filtered(*filters).groupby(['startstationname', 'endstationname'], observed=True, sort=False).size()
+    top_routes = top_routes.nlargest(10).reset_index(name='count')
+    top_routes['route'] = (top_routes['startstationname'].astype('string[pyarrow]') + ' → ' +
+                           top_routes['endstationname'].astype('string[pyarrow]'))
+    return top_routes
+
+
+@st.cache_data
+def histogram(filters, column):
+    """50-bin histogram (bin edges and counts) of a numeric column"""
+    if filters is None:
+        return load_aggregate(f'hist_{column}')
+    counts, edges = np.histogram(get_filtered(*filters)[column], bins=50)
+    return pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'count': counts})
+
+
+@st.cache_data
+def bike_type_summary(filters):
+    """Trip count and averages per bike type"""
+    if filters is None:
+        return load_aggregate('bike_types')
+    return get_filtered(*filters).groupby('CycleType', observed=True, sort=True).agg({
+        'route_code': 'count',
+        'duration_minutes_calculated': 'mean',
+        'length': 'mean',
+        'costs': 'mean'
+    }).reset_index()
+
+
+@st.cache_data
+def correlation_matrix(filters):
+    """Correlation matrix of CORR_FEATURES"""
+    if filters is None:
+        return load_aggregate('correlation')
+    return get_filtered(*filters)[CORR_FEATURES].corr()
+
+# Figure builders (plain functions, safe to run in worker threads)
+def build_hourly_figure(hourly):
+    """Bar chart of trips by hour of day"""
+    fig = px.bar(
+        hourly,
+        x='unlock_hour',
+        y='count',
+        title='Trips by Hour of Day',
+        labels={'unlock_hour': 'Hour', 'count': 'Number of Trips'},
+        color='count',
+        color_continuous_scale='Blues'
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def build_daily_figure(daily):
+    """Bar chart of trips by day of week"""
+    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    daily['day_name'] = daily['unlock_dayofweek'].map(dict(enumerate(day_names)))
+    fig = px.bar(
+        daily,
+        x='day_name',
+        y='count',
+        category_orders={'day_name': day_names},
+        title='Trips by Day of Week',
+        labels={'day_name': 'Day', 'count': 'Number of Trips'},
+        color='count',
+        color_continuous_scale='Reds'
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def build_station_figure(top, title, color_scale):
+    """Horizontal bar chart of station trip counts"""
+    fig = px.bar(
+        x=top.values,
+        y=top.index,
+        orientation='h',
+        title=title,
+        labels={'x': 'Number of Trips', 'y': 'Station'},
+        color=top.values,
+        color_continuous_scale=color_scale
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def build_histogram_figure(hist, title, xlabel, color):
+    """Bar chart of pre-binned histogram counts"""
+    fig = go.Figure(go.Bar(
+        x=(hist['left'] + hist['right']) / 2,
+        y=hist['count'],
+        width=hist['right'] - hist['left'],
+        marker_color=color
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=xlabel,
+        yaxis_title='Frequency',
+        bargap=0,
+        height=400
+    )
+    return fig
+
+
 # Header
 st.markdown('<h1 class="main-header">🚲 Tartu Smart Bike Analysis Dashboard</h1>', unsafe_allow_html=True)
 st.markdown("---")
@@ -76,27 +283,37 @@ try:
     time_periods = ['All'] + list(routes['time_period'].unique())
     selected_time_period = st.sidebar.selectbox("Time Period", time_periods)
 
-    # Apply filters
-    filtered_routes = routes.copy()
-    if selected_bike_type != 'All':
-        filtered_routes = filtered_routes[filtered_routes['CycleType'] == selected_bike_type]
-    if selected_time_period != 'All':
-        filtered_routes = filtered_routes[filtered_routes['time_period'] == selected_time_period]
+    # Apply filters (date_input yields a single date while a range is being picked)
+    if len(date_range) == 2:
+        date_lo, date_hi = date_range
+    else:
+        date_lo, date_hi = date_range[0], routes['unlock_datetime'].max().date()
+    filters = (selected_bike_type, selected_time_period, date_lo, date_hi)
+
+    # Without active filters the tab aggregates come precomputed from disk
+    is_unfiltered = (
+        selected_bike_type == 'All' and selected_time_period == 'All' and
+        date_lo <= routes['unlock_datetime'].min().date() and
+        date_hi >= routes['unlock_datetime'].max().date()
+    )
+    agg_filters = None if is_unfiltered else filters
 
     # Key metrics
     st.header("📈 Key Metrics")
     col1, col2, col3, col4, col5 = st.columns(5)
 
+    metrics = key_metrics(agg_filters)
+
     with col1:
-        st.metric("Total Trips", f"{len(filtered_routes):,}")
+        st.metric("Total Trips", f"{metrics['trips']:,}")
     with col2:
-        st.metric("Avg Duration", f"{filtered_routes['duration_minutes_calculated'].mean():.1f} min")
+        st.metric("Avg Duration", f"{metrics['avg_duration']:.1f} min")
     with col3:
-        st.metric("Avg Distance", f"{filtered_routes['length'].mean():.2f} km")
+        st.metric("Avg Distance", f"{metrics['avg_distance']:.2f} km")
     with col4:
-        st.metric("Unique Bikes", f"{filtered_routes['cyclenumber'].nunique():,}")
+        st.metric("Unique Bikes", f"{metrics['unique_bikes']:,}")
     with col5:
-        st.metric("Unique Stations", f"{filtered_routes['startstationname'].nunique():,}")
+        st.metric("Unique Stations", f"{metrics['unique_stations']:,}")
 
     st.markdown("---")
 
@@ -106,46 +323,17 @@ try:
     with tab1:
         st.header("Temporal Patterns")
 
-        col1, col2 = st.columns(2)
-
-        with col1:
-            # Hourly pattern
-            hourly = filtered_routes.groupby('unlock_hour').size().reset_index(name='count')
-            fig = px.bar(
-                hourly,
-                x='unlock_hour',
-                y='count',
-                title='Trips by Hour of Day',
-                labels={'unlock_hour': 'Hour', 'count': 'Number of Trips'},
-                color='count',
-                color_continuous_scale='Blues'
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+        # Hourly and daily figures are built concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            hourly_fig = executor.submit(build_hourly_figure, hourly_counts(agg_filters))
+            daily_fig = executor.submit(build_daily_figure, daily_counts(agg_filters))
 
-        with col2:
-            # Daily pattern
-            daily = filtered_routes.groupby('unlock_dayofweek').size().reset_index(name='count')
-            day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            daily['day_name'] = daily['unlock_dayofweek'].map(dict(enumerate(day_names)))
-            fig = px.bar(
-                daily,
-                x='day_name',
-                y='count',
-                title='Trips by Day of Week',
-                labels={'day_name': 'Day', 'count': 'Number of Trips'},
-                color='count',
-                color_continuous_scale='Reds'
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+        col1, col2 = st.columns(2)
+        col1.plotly_chart(hourly_fig.result(), use_container_width=True)
+        col2.plotly_chart(daily_fig.result(), use_container_width=True)
 
         # Time period comparison
-        time_period_stats = filtered_routes.groupby('time_period').agg({
-            'route_code': 'count',
-            'duration_minutes_calculated': 'mean',
-            'length': 'mean'
-        }).reset_index()
+        time_period_stats = time_period_summary(agg_filters)
         time_period_stats.columns = ['Time Period', 'Trip Count', 'Avg Duration (min)', 'Avg Distance (km)']
 
         st.subheader("Time Period Statistics")
@@ -154,43 +342,19 @@ try:
     with tab2:
         st.header("Spatial Patterns")
 
-        col1, col2 = st.columns(2)
+        top_starts, top_ends = top_stations(agg_filters)
 
-        with col1:
-            # Top start stations
-            top_starts = filtered_routes['startstationname'].value_counts().head(10)
-            fig = px.bar(
-                x=top_starts.values,
-                y=top_starts.index,
-                orientation='h',
-                title='Top 10 Start Stations',
-                labels={'x': 'Number of Trips', 'y': 'Station'},
-                color=top_starts.values,
-                color_continuous_scale='Viridis'
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            starts_fig = executor.submit(build_station_figure, top_starts, 'Top 10 Start Stations', 'Viridis')
+            ends_fig = executor.submit(build_station_figure, top_ends, 'Top 10 End Stations', 'Plasma')
 
-        with col2:
-            # Top end stations
-            top_ends = filtered_routes['endstationname'].value_counts().head(10)
-            fig = px.bar(
-                x=top_ends.values,
-                y=top_ends.index,
-                orientation='h',
-                title='Top 10 End Stations',
-                labels={'x': 'Number of Trips', 'y': 'Station'},
-                color=top_ends.values,
-                color_continuous_scale='Plasma'
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+        col1, col2 = st.columns(2)
+        col1.plotly_chart(starts_fig.result(), use_container_width=True)
+        col2.plotly_chart(ends_fig.result(), use_container_width=True)
 
         # Top routes
         st.subheader("Top 10 Popular Routes")
-        top_routes = filtered_routes.groupby(['startstationname', 'endstationname']).size().reset_index(name='count')
-        top_routes = top_routes.sort_values('count', ascending=False).head(10)
-        top_routes['route'] = top_routes['startstationname'] + ' → ' + top_routes['endstationname']
+        top_routes = top_routes_summary(agg_filters)
 
         fig = px.bar(
             top_routes,
@@ -208,49 +372,29 @@ try:
     with tab3:
         st.header("Statistical Analysis")
 
-        col1, col2 = st.columns(2)
-
-        with col1:
-            # Duration distribution
-            fig = px.histogram(
-                filtered_routes,
-                x='duration_minutes_calculated',
-                nbins=50,
-                title='Trip Duration Distribution',
-                labels={'duration_minutes_calculated': 'Duration (minutes)', 'count': 'Frequency'},
-                color_discrete_sequence=['steelblue']
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            duration_fig = executor.submit(
+                build_histogram_figure, histogram(agg_filters, 'duration_minutes_calculated'),
+                'Trip Duration Distribution', 'Duration (minutes)', 'steelblue'
             )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
-
-        with col2:
-            # Distance distribution
-            fig = px.histogram(
-                filtered_routes,
-                x='length',
-                nbins=50,
-                title='Trip Distance Distribution',
-                labels={'length': 'Distance (km)', 'count': 'Frequency'},
-                color_discrete_sequence=['coral']
+            distance_fig = executor.submit(
+                build_histogram_figure, histogram(agg_filters, 'length'),
+                'Trip Distance Distribution', 'Distance (km)', 'coral'
             )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        col1.plotly_chart(duration_fig.result(), use_container_width=True)
+        col2.plotly_chart(distance_fig.result(), use_container_width=True)
 
         # Bike type comparison
         st.subheader("Bike Type Comparison")
-        bike_stats = filtered_routes.groupby('CycleType').agg({
-            'route_code': 'count',
-            'duration_minutes_calculated': 'mean',
-            'length': 'mean',
-            'costs': 'mean'
-        }).reset_index()
+        bike_stats = bike_type_summary(agg_filters)
         bike_stats.columns = ['Bike Type', 'Trip Count', 'Avg Duration (min)', 'Avg Distance (km)', 'Avg Cost']
         st.dataframe(bike_stats, use_container_width=True)
 
         # Correlation matrix
         st.subheader("Correlation Analysis")
-        corr_features = ['duration_minutes_calculated', 'length', 'costs', 'unlock_hour']
-        corr_matrix = filtered_routes[corr_features].corr()
+        corr_matrix = correlation_matrix(agg_filters)
 
         fig = px.imshow(
             corr_matrix,
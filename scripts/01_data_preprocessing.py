@@ -11,13 +11,18 @@ Data Sets:
 - Smart Bike Tartu_july 2019.xlsx: Data dictionary
 
 Outputs:
-- processed_data/routes_cleaned.csv: Cleaned trip data
-- processed_data/locations_cleaned.csv: Cleaned location data
+- processed_data/routes_cleaned.parquet: Cleaned trip data
+- processed_data/routes_cleaned.feather: Cleaned trip data snapshot for the dashboard
+- processed_data/locations_cleaned.parquet: Cleaned location data
+- processed_data/agg_*.parquet: Dashboard aggregates for the unfiltered data
 - processed_data/data_quality_report.txt: Data quality report
 """
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.dataset as ds
 import os
 from datetime import datetime
 import warnings
@@ -31,6 +36,72 @@ PROCESSED_DIR = os.path.join(BASE_DIR, 'processed_data')
 # Create processed data folder
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+# Explicit column types for the raw CSVs (no type inference pass);
+# date/time columns stay as strings so they can be combined before parsing
+ROUTES_COLUMN_TYPES = {
+    'route_code': pa.int64(),
+    'cyclenumber': pa.int32(),
+    'unlockedat': pa.string(),
+    'unlockedattime': pa.string(),
+    'lockedat': pa.string(),
+    'lockedattime': pa.string(),
+    'startstationname': pa.string(),
+    'endstationname': pa.string(),
+    'rfidnumber': pa.string(),
+    'length': pa.float64(),
+    'DurationMinutes': pa.float64(),
+    'CycleType': pa.string(),
+    'costs': pa.float64(),
+    'Membership': pa.string()
+}
+LOCATIONS_COLUMN_TYPES = {
+    'route_code': pa.int64(),
+    'cyclenumber': pa.int32(),
+    'latitude': pa.float32(),
+    'longitude': pa.float32(),
+    'coord_date': pa.string(),
+    'coord_time': pa.string()
+}
+
+
+def load_csv_files(files, prefix, column_types):
+    """
+    Read CSV files in one multithreaded Arrow dataset scan and return a single DataFrame.
+
+    Args:
+        files (list): CSV file names inside DATA_DIR
+        prefix (str): File name prefix stripped to get the source date
+        column_types (dict): Explicit Arrow types for selected columns
+
+    Returns:
+        pd.DataFrame: Concatenated data with a categorical data_source_date column
+    """
+    csv_format = ds.CsvFileFormat(convert_options=pcsv.ConvertOptions(column_types=column_types))
+    paths = [os.path.join(DATA_DIR, f) for f in files]
+    dataset = ds.dataset(paths, format=csv_format)
+
+    # Scan all files at once; each batch is tagged with the file it came from
+    file_index = {path: i for i, path in enumerate(paths)}
+    batches = []
+    batch_files = []
+    for tagged in dataset.scanner(use_threads=True).scan_batches():
+        batches.append(tagged.record_batch)
+        batch_files.append(file_index[tagged.fragment.path])
+    table = pa.Table.from_batches(batches, schema=dataset.schema)
+
+    # Source date as a dictionary column: one string per file (date from the
+    # filename), one int32 index per row
+    batch_rows = np.array([batch.num_rows for batch in batches], dtype=np.int64)
+    row_files = np.repeat(np.array(batch_files, dtype=np.int32), batch_rows)
+    dates = pa.array([f.replace(prefix, '').replace('.csv', '') for f in files], pa.string())
+    table = table.append_column('data_source_date', pa.DictionaryArray.from_arrays(row_files, dates))
+
+    for file, count in zip(files, np.bincount(row_files, minlength=len(files))):
+        print(f"  ✓ {file}: {count:,} records loaded")
+
+    return table.to_pandas()
+
+
 print("=" * 80)
 print("TARTU BIKE DATA - DATA PREPROCESSING AND CLEANING")
 print("=" * 80)
@@ -51,17 +122,7 @@ for f in routes_files:
     print(f"  - {f}")
 
 # Merge routes data
-routes_list = []
-for file in routes_files:
-    file_path = os.path.join(DATA_DIR, file)
-    df = pd.read_csv(file_path)
-    # Extract date from filename
-    date_str = file.replace('routes_', '').replace('.csv', '')
-    df['data_source_date'] = date_str
-    routes_list.append(df)
-    print(f"  ✓ {file}: {len(df)} records loaded")
-
-routes_df = pd.concat(routes_list, ignore_index=True)
+routes_df = load_csv_files(routes_files, 'routes_', ROUTES_COLUMN_TYPES)
 print(f"\nTotal routes records: {len(routes_df):,}")
 
 # Find and load all locations files
@@ -73,17 +134,7 @@ for f in locations_files:
     print(f"  - {f}")
 
 # Merge locations data
-locations_list = []
-for file in locations_files:
-    file_path = os.path.join(DATA_DIR, file)
-    df = pd.read_csv(file_path)
-    # Extract date from filename
-    date_str = file.replace('locations_', '').replace('.csv', '')
-    df['data_source_date'] = date_str
-    locations_list.append(df)
-    print(f"  ✓ {file}: {len(df):,} records loaded")
-
-locations_df = pd.concat(locations_list, ignore_index=True)
+locations_df = load_csv_files(locations_files, 'locations_', LOCATIONS_COLUMN_TYPES)
 print(f"\nTotal locations records: {len(locations_df):,}")
 
 # ============================================================================
@@ -109,10 +160,10 @@ quality_report.append(f"Total Columns: {len(routes_df.columns)}")
 
 quality_report.append("\n\nColumn Information:")
 quality_report.append("-" * 80)
-for col in routes_df.columns:
-    null_count = routes_df[col].isnull().sum()
+routes_null_counts = routes_df.isnull().sum()
+for col, dtype in routes_df.dtypes.items():
+    null_count = routes_null_counts[col]
     null_pct = (null_count / len(routes_df)) * 100
-    dtype = routes_df[col].dtype
     quality_report.append(f"{col:20s} | Type: {str(dtype):10s} | Null: {null_count:6,} ({null_pct:5.2f}%)")
 
 # Locations data quality
@@ -124,23 +175,23 @@ quality_report.append(f"Total Columns: {len(locations_df.columns)}")
 
 quality_report.append("\n\nColumn Information:")
 quality_report.append("-" * 80)
-for col in locations_df.columns:
-    null_count = locations_df[col].isnull().sum()
+locations_null_counts = locations_df.isnull().sum()
+for col, dtype in locations_df.dtypes.items():
+    null_count = locations_null_counts[col]
     null_pct = (null_count / len(locations_df)) * 100
-    dtype = locations_df[col].dtype
     quality_report.append(f"{col:20s} | Type: {str(dtype):10s} | Null: {null_count:6,} ({null_pct:5.2f}%)")
 
 # Print summary to screen
 print("\nRoutes Data Summary:")
 print(f"  - Total Records: {len(routes_df):,}")
 print(f"  - Total Columns: {len(routes_df.columns)}")
-print(f"  - Columns with Null Values: {routes_df.isnull().any().sum()}")
+print(f"  - Columns with Null Values: {(routes_null_counts > 0).sum()}")
 print(f"  - Duplicate route_code: {routes_df['route_code'].duplicated().sum():,}")
 
 print("\nLocations Data Summary:")
 print(f"  - Total Records: {len(locations_df):,}")
 print(f"  - Total Columns: {len(locations_df.columns)}")
-print(f"  - Columns with Null Values: {locations_df.isnull().any().sum()}")
+print(f"  - Columns with Null Values: {(locations_null_counts > 0).sum()}")
 
 # ============================================================================
 # 3. DATA CLEANING
@@ -157,14 +208,14 @@ print("\nCleaning routes data...")
 
 # 3.1. Combine and fix date/time columns
 print("  • Combining date and time columns...")
-routes_df['unlock_datetime'] = pd.to_datetime(
-    routes_df['unlockedat'] + ' ' + routes_df['unlockedattime'],
-    errors='coerce'
-)
-routes_df['lock_datetime'] = pd.to_datetime(
-    routes_df['lockedat'] + ' ' + routes_df['lockedattime'],
-    errors='coerce'
-)
+# Unlock and lock strings are parsed in one call with an explicit format
+datetime_strings = np.concatenate([
+    (routes_df['unlockedat'] + ' ' + routes_df['unlockedattime']).to_numpy(),
+    (routes_df['lockedat'] + ' ' + routes_df['lockedattime']).to_numpy()
+])
+parsed_datetimes = pd.to_datetime(datetime_strings, format='%Y-%m-%d %H:%M:%S', errors='coerce', cache=True)
+routes_df['unlock_datetime'] = parsed_datetimes[:len(routes_df)]
+routes_df['lock_datetime'] = parsed_datetimes[len(routes_df):]
 
 # 3.2. Check and remove null datetime values
 null_unlock = routes_df['unlock_datetime'].isnull().sum()
@@ -197,9 +248,9 @@ routes_df = routes_df[
 print(f"  ✓ Removed {before_distance_filter - len(routes_df)} records with invalid distance")
 
 # 3.5. Duplicate route_code check
-before_dup = len(routes_df)
-routes_df = routes_df.drop_duplicates(subset=['route_code'], keep='first')
-print(f"  ✓ Removed {before_dup - len(routes_df)} duplicate route_code records")
+duplicate_mask = routes_df['route_code'].duplicated(keep='first').to_numpy()
+routes_df = routes_df.iloc[~duplicate_mask]
+print(f"  ✓ Removed {duplicate_mask.sum()} duplicate route_code records")
 
 # 3.6. Add time features
 routes_df['unlock_hour'] = routes_df['unlock_datetime'].dt.hour
@@ -209,20 +260,13 @@ routes_df['unlock_month'] = routes_df['unlock_datetime'].dt.month
 routes_df['unlock_day'] = routes_df['unlock_datetime'].dt.day
 
 # Weekday/Weekend flag
-routes_df['is_weekend'] = routes_df['unlock_dayofweek'].isin([5, 6]).astype(int)
+routes_df['is_weekend'] = (routes_df['unlock_dayofweek'].to_numpy() >= 5).astype('uint8')
 
-# Time period (morning, afternoon, evening, night)
-def get_time_period(hour):
-    if 6 <= hour < 12:
-        return 'Morning'
-    elif 12 <= hour < 18:
-        return 'Afternoon'
-    elif 18 <= hour < 22:
-        return 'Evening'
-    else:
-        return 'Night'
-
-routes_df['time_period'] = routes_df['unlock_hour'].apply(get_time_period)
+# Time period (morning, afternoon, evening, night), looked up by hour index
+HOUR_TO_PERIOD = np.array(
+    ['Night'] * 6 + ['Morning'] * 6 + ['Afternoon'] * 6 + ['Evening'] * 4 + ['Night'] * 2
+)
+routes_df['time_period'] = HOUR_TO_PERIOD[routes_df['unlock_hour'].to_numpy()]
 
 print(f"  ✓ Added time features")
 
@@ -234,10 +278,25 @@ for col in text_columns:
 
 print(f"  ✓ Cleaned text columns")
 
+# 3.8. Store low-cardinality text columns as categoricals
+category_columns = ['startstationname', 'endstationname', 'CycleType', 'Membership', 'time_period']
+for col in category_columns:
+    if col in routes_df.columns:
+        routes_df[col] = routes_df[col].astype('category')
+
+# Start and end stations share one category set so they compare by code
+station_categories = routes_df['startstationname'].cat.categories.union(
+    routes_df['endstationname'].cat.categories
+)
+for col in ['startstationname', 'endstationname']:
+    routes_df[col] = routes_df[col].cat.set_categories(station_categories)
+
+print(f"  ✓ Converted categorical columns")
+
 # --- LOCATIONS CLEANING ---
 print("\nCleaning locations data...")
 
-# 3.8. Combine date/time columns
+# 3.9. Combine date/time columns
 print("  • Combining date and time columns...")
 locations_df['coord_datetime'] = pd.to_datetime(
     locations_df['coord_date'] + ' ' + locations_df['coord_time'],
@@ -249,29 +308,29 @@ null_coord = locations_df['coord_datetime'].isnull().sum()
 print(f"  • Invalid coord_datetime: {null_coord}")
 locations_df = locations_df.dropna(subset=['coord_datetime'])
 
-# 3.9. GPS coordinates validation (near Tartu, Estonia)
+# 3.10. GPS coordinates validation (near Tartu, Estonia)
 # Tartu approximately: lat ~58.38, lon ~26.72
 before_gps_filter = len(locations_df)
-locations_df = locations_df[
-    (locations_df['latitude'].between(58.0, 59.0)) &
-    (locations_df['longitude'].between(26.0, 27.5))
-]
+lat = locations_df['latitude'].to_numpy()
+lon = locations_df['longitude'].to_numpy()
+locations_df = locations_df.iloc[(lat >= 58.0) & (lat <= 59.0) & (lon >= 26.0) & (lon <= 27.5)]
 print(f"  ✓ Removed {before_gps_filter - len(locations_df)} records with invalid GPS coordinates")
 
-# 3.10. Null latitude/longitude check
+# 3.11. Null latitude/longitude check
 locations_df = locations_df.dropna(subset=['latitude', 'longitude'])
 
-# 3.11. Add time features
+# 3.12. Add time features
 locations_df['coord_hour'] = locations_df['coord_datetime'].dt.hour
 locations_df['coord_minute'] = locations_df['coord_datetime'].dt.minute
 locations_df['coord_second'] = locations_df['coord_datetime'].dt.second
 
 print(f"  ✓ Added time features")
 
-# 3.12. Keep only route_codes that exist in routes
-valid_route_codes = set(routes_df['route_code'].unique())
+# 3.13. Keep only route_codes that exist in routes
+# (semi-join against the deduplicated route codes)
+valid_route_codes = pd.DataFrame({'route_code': routes_df['route_code'].unique()})
 before_route_filter = len(locations_df)
-locations_df = locations_df[locations_df['route_code'].isin(valid_route_codes)]
+locations_df = locations_df.merge(valid_route_codes, on='route_code', how='inner', sort=False)
 print(f"  ✓ Removed {before_route_filter - len(locations_df):,} locations records not found in routes")
 
 # ============================================================================
@@ -357,15 +416,71 @@ print(f"  - Removed:  {initial_locations_count - len(locations_df):,} ({((initia
 print("\n[5/5] Saving Cleaned Data...")
 print("-" * 80)
 
-# Save routes
-routes_output_path = os.path.join(PROCESSED_DIR, 'routes_cleaned.csv')
-routes_df.to_csv(routes_output_path, index=False)
+# Downcast numeric columns (statistics above are computed at full precision)
+for col in ['unlock_hour', 'unlock_dayofweek', 'unlock_month', 'unlock_day', 'is_weekend']:
+    routes_df[col] = routes_df[col].astype('uint8')
+for col in ['length', 'duration_minutes_calculated', 'costs']:
+    routes_df[col] = routes_df[col].astype('float32')
+
+# Save routes (Parquet keeps dtypes; small row groups allow column/row pruning)
+routes_output_path = os.path.join(PROCESSED_DIR, 'routes_cleaned.parquet')
+routes_df.to_parquet(routes_output_path, engine='pyarrow', compression='zstd',
+                     row_group_size=10_000, index=False)
 print(f"  ✓ Routes saved: {routes_output_path}")
 print(f"    ({len(routes_df):,} records, {len(routes_df.columns)} columns)")
 
-# Save locations
-locations_output_path = os.path.join(PROCESSED_DIR, 'locations_cleaned.csv')
-locations_df.to_csv(locations_output_path, index=False)
+# Save routes as uncompressed Feather (Arrow IPC snapshot for dashboard cold starts)
+routes_feather_path = os.path.join(PROCESSED_DIR, 'routes_cleaned.feather')
+routes_df.reset_index(drop=True).to_feather(routes_feather_path, compression='uncompressed')
+print(f"  ✓ Routes saved: {routes_feather_path}")
+
+# Save dashboard aggregates (used when no dashboard filter is active)
+top_routes = routes_df.groupby(['startstationname', 'endstationname'], observed=True, sort=False).size()
+top_routes = top_routes.nlargest(10).reset_index(name='count')
+top_routes['route'] = (top_routes['startstationname'].astype('string[pyarrow]') + ' → ' +
+                       top_routes['endstationname'].astype('string[pyarrow]'))
+
+# Station trip counts: one bincount per side over the shared category codes
+station_counts = {}
+for col in ['startstationname', 'endstationname']:
+    codes = routes_df[col].cat.codes.to_numpy()
+    station_counts[col] = pd.Series(np.bincount(codes[codes >= 0], minlength=len(station_categories)),
+                                    index=pd.Index(station_categories, name=col), name='count')
+
+# Categorical keys are sorted (by category code, free) so the tables keep a
+# fixed row order that matches the filtered versions in the dashboard
+dashboard_aggregates = {
+    'hourly': routes_df.groupby('unlock_hour', sort=False).size().reset_index(name='count'),
+    'daily': routes_df.groupby('unlock_dayofweek', sort=False).size().reset_index(name='count'),
+    'time_periods': routes_df.groupby('time_period', observed=True, sort=True).agg({
+        'route_code': 'count',
+        'duration_minutes_calculated': 'mean',
+        'length': 'mean'
+    }).reset_index(),
+    'top_startstationname': station_counts['startstationname'].nlargest(10).to_frame(),
+    'top_endstationname': station_counts['endstationname'].nlargest(10).to_frame(),
+    'top_routes': top_routes,
+    'bike_types': routes_df.groupby('CycleType', observed=True, sort=True).agg({
+        'route_code': 'count',
+        'duration_minutes_calculated': 'mean',
+        'length': 'mean',
+        'costs': 'mean'
+    }).reset_index(),
+    'correlation': routes_df[['duration_minutes_calculated', 'length', 'costs', 'unlock_hour']].corr()
+}
+for col in ['duration_minutes_calculated', 'length']:
+    counts, edges = np.histogram(routes_df[col], bins=50)
+    dashboard_aggregates[f'hist_{col}'] = pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'count': counts})
+for name, aggregate in dashboard_aggregates.items():
+    aggregate.to_parquet(os.path.join(PROCESSED_DIR, f'agg_{name}.parquet'), engine='pyarrow')
+print(f"  ✓ Dashboard aggregates saved: {len(dashboard_aggregates)} files (agg_*.parquet)")
+
+# Save locations grouped by route (stable sort keeps each route's point order),
+# so per-route endpoints are contiguous runs for the EDA
+locations_df = locations_df.sort_values('route_code', kind='stable', ignore_index=True)
+locations_output_path = os.path.join(PROCESSED_DIR, 'locations_cleaned.parquet')
+locations_df.to_parquet(locations_output_path, engine='pyarrow', compression='zstd',
+                        row_group_size=10_000, index=False)
 print(f"  ✓ Locations saved: {locations_output_path}")
 print(f"    ({len(locations_df):,} records, {len(locations_df.columns)} columns)")
 
@@ -401,10 +516,11 @@ print("DATA PREPROCESSING COMPLETED!")
 print("=" * 80)
 print("\nOutput Files:")
 print(f"  1. {routes_output_path}")
-print(f"  2. {locations_output_path}")
-print(f"  3. {report_path}")
-print(f"  4. {routes_columns_path}")
-print(f"  5. {locations_columns_path}")
+print(f"  2. {routes_feather_path}")
+print(f"  3. {locations_output_path}")
+print(f"  4. {report_path}")
+print(f"  5. {routes_columns_path}")
+print(f"  6. {locations_columns_path}")
 
 print("\nNext Steps:")
 print("  - Review the data quality report")
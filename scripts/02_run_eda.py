@@ -7,13 +7,21 @@ Main script to run all EDA analyses.
 This is the orchestrator that calls modular analysis functions.
 """
 
+import os
 import sys
+import multiprocessing
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 warnings.filterwarnings('ignore')
 
+# Figures are only written to files; select the non-interactive backend
+# before any analysis module imports pyplot
+import matplotlib
+matplotlib.use('Agg')
+
 # Add analysis package to path
 from analysis import config
-from analysis.data_loader import load_routes_data, load_locations_data, get_data_summary
+from analysis.data_loader import load_routes_data, summarize_locations, get_data_summary
 from analysis.temporal_analysis import run_temporal_analysis
 from analysis.spatial_analysis import run_spatial_analysis
 from analysis.statistical_analysis import run_statistical_analysis
@@ -21,109 +29,120 @@ from analysis.ml_models import run_ml_analysis
 from analysis.interactive_viz import run_interactive_visualizations
 from analysis.network_analysis import run_network_analysis
 from analysis.time_series_forecast import run_time_series_forecasting
-from analysis.utils.plotting import setup_plot_style
+from analysis.utils.plotting import setup_plot_style, init_render_worker
 from analysis.utils.reporting import MarkdownReport
 
-print("=" * 80)
-print("TARTU BIKE DATA - EXPLORATORY DATA ANALYSIS")
-print("=" * 80)
-
-# Setup
-print("\n[Setup]")
-print("-" * 80)
-config.ensure_directories()
-setup_plot_style()
-print("  ✓ Directories created")
-print("  ✓ Plot style configured")
-
-# Load data
-print("\n[Data Loading]")
-print("-" * 80)
-
-try:
-    routes = load_routes_data()
-    locations = load_locations_data()
-    print(f"  ✓ Routes loaded: {len(routes):,} records")
-    print(f"  ✓ Locations loaded: {len(locations):,} GPS points")
-except FileNotFoundError as e:
-    print(f"  ✗ Error: {e}")
-    print("\n  Please run 01_data_preprocessing.py first!")
-    sys.exit(1)
-
-# Get summary
-summary = get_data_summary(routes, locations)
-
-# Initialize report
-report = MarkdownReport("Tartu Bike Data - Exploratory Data Analysis Report")
-
-report.add_section("Dataset Overview")
-report.add_stat("Total trips", summary['total_trips'])
-report.add_stat("Total GPS points", summary['total_gps_points'])
-report.add_line(f"- **Date range**: {summary['date_range'][0]} to {summary['date_range'][1]}")
-report.add_stat("Unique bikes", summary['unique_bikes'])
-report.add_stat("Unique stations", summary['unique_stations'])
-report.add_line("")
-
-# Run analyses
-all_results = {}
-
-# Temporal Analysis
-temporal_results = run_temporal_analysis(routes, report)
-all_results['temporal'] = temporal_results
-
-# Spatial Analysis
-spatial_results = run_spatial_analysis(routes, report)
-all_results['spatial'] = spatial_results
-
-# Statistical Analysis
-statistical_results = run_statistical_analysis(routes, report)
-all_results['statistical'] = statistical_results
-
-# Machine Learning Analysis
-ml_results = run_ml_analysis(routes, report)
-all_results['ml'] = ml_results
-
-# Interactive Visualizations
-interactive_results = run_interactive_visualizations(routes, locations, report)
-all_results['interactive'] = interactive_results
-
-# Network Analysis
-network_results = run_network_analysis(routes, report)
-all_results['network'] = network_results
-
-# Time Series Forecasting
-forecast_results = run_time_series_forecasting(routes, report)
-all_results['forecast'] = forecast_results
-
-# Save report
-print("\n[Saving Report]")
-print("-" * 80)
 
-import os
-report_path = os.path.join(config.REPORTS_DIR, 'eda_report.md')
-report.save(report_path)
-print(f"  ✓ Report saved: {report_path}")
-
-# Summary
-print("\n" + "=" * 80)
-print("EXPLORATORY DATA ANALYSIS COMPLETED!")
-print("=" * 80)
-
-print("\nKey Findings:")
-print(f"  • Peak hour: {temporal_results['hourly']['peak_hour']}:00")
-print(f"  • Most popular station: {spatial_results['stations']['top_start'].index[0]}")
-print(f"  • Round trip percentage: {spatial_results['trip_types']['round_trip_pct']:.1f}%")
-print(f"  • ML models trained: {len(ml_results)} analyses")
-print(f"  • Interactive visualizations: {len(interactive_results)} maps/charts")
-print(f"  • Network nodes: {network_results['network']['stats']['nodes']} stations")
-print(f"  • Network edges: {network_results['network']['stats']['edges']} routes")
-if forecast_results['prophet']['metrics'] is not None:
-    print(f"  • Forecast MAE (Prophet): {forecast_results['prophet']['metrics']['mae']:.2f} trips")
-elif 'sarima' in forecast_results and forecast_results['sarima']['metrics'] is not None:
-    print(f"  • Forecast MAE (SARIMA): {forecast_results['sarima']['metrics']['mae']:.2f} trips")
-
-print("\nGenerated Files:")
-print(f"  • Report: {report_path}")
-print(f"  • Visualizations: {config.VIZ_DIR}/")
-
-print("\n" + "=" * 80)
+def main():
+    """Run every analysis and write the EDA report."""
+    print("=" * 80)
+    print("TARTU BIKE DATA - EXPLORATORY DATA ANALYSIS")
+    print("=" * 80)
+
+    # Setup
+    print("\n[Setup]")
+    print("-" * 80)
+    config.ensure_directories()
+    setup_plot_style()
+    print("  ✓ Directories created")
+    print("  ✓ Plot style configured")
+
+    # Load data
+    print("\n[Data Loading]")
+    print("-" * 80)
+
+    try:
+        routes = load_routes_data()
+        locations = summarize_locations()
+        print(f"  ✓ Routes loaded: {len(routes):,} records")
+        print(f"  ✓ Locations streamed: {locations['total_gps_points']:,} GPS points")
+    except FileNotFoundError as e:
+        print(f"  ✗ Error: {e}")
+        print("\n  Please run 01_data_preprocessing.py first!")
+        sys.exit(1)
+
+    # Get summary
+    summary = get_data_summary(routes, locations['total_gps_points'])
+
+    # Initialize report
+    report = MarkdownReport("Tartu Bike Data - Exploratory Data Analysis Report")
+
+    report.add_section("Dataset Overview")
+    report.add_stat("Total trips", summary['total_trips'])
+    report.add_stat("Total GPS points", summary['total_gps_points'])
+    report.add_line(f"- **Date range**: {summary['date_range'][0]} to {summary['date_range'][1]}")
+    report.add_stat("Unique bikes", summary['unique_bikes'])
+    report.add_stat("Unique stations", summary['unique_stations'])
+    report.add_line("")
+
+    # Run analyses
+    all_results = {}
+
+    # Temporal and spatial figures render in worker processes; spawned
+    # workers import the analysis modules afresh instead of forking this
+    # process and its running threads
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_render_worker) as executor:
+        # Temporal Analysis
+        temporal_results = run_temporal_analysis(routes, report, executor)
+        all_results['temporal'] = temporal_results
+
+        # Spatial Analysis
+        spatial_results = run_spatial_analysis(routes, report, executor)
+        all_results['spatial'] = spatial_results
+
+    # Statistical Analysis
+    statistical_results = run_statistical_analysis(routes, report)
+    all_results['statistical'] = statistical_results
+
+    # Machine Learning Analysis
+    ml_results = run_ml_analysis(routes, report)
+    all_results['ml'] = ml_results
+
+    # Interactive Visualizations
+    interactive_results = run_interactive_visualizations(routes, locations, report)
+    all_results['interactive'] = interactive_results
+
+    # Network Analysis
+    network_results = run_network_analysis(routes, report)
+    all_results['network'] = network_results
+
+    # Time Series Forecasting
+    forecast_results = run_time_series_forecasting(routes, report)
+    all_results['forecast'] = forecast_results
+
+    # Save report
+    print("\n[Saving Report]")
+    print("-" * 80)
+
+    report_path = os.path.join(config.REPORTS_DIR, 'eda_report.md')
+    report.save(report_path)
+    print(f"  ✓ Report saved: {report_path}")
+
+    # Summary
+    print("\n" + "=" * 80)
+    print("EXPLORATORY DATA ANALYSIS COMPLETED!")
+    print("=" * 80)
+
+    print("\nKey Findings:")
+    print(f"  • Peak hour: {temporal_results['hourly']['peak_hour']}:00")
+    print(f"  • Most popular station: {spatial_results['stations']['top_start'].index[0]}")
+    print(f"  • Round trip percentage: {spatial_results['trip_types']['round_trip_pct']:.1f}%")
+    print(f"  • ML models trained: {len(ml_results)} analyses")
+    print(f"  • Interactive visualizations: {len(interactive_results)} maps/charts")
+    print(f"  • Network nodes: {network_results['network']['stats']['nodes']} stations")
+    print(f"  • Network edges: {network_results['network']['stats']['edges']} routes")
+    if forecast_results['prophet']['metrics'] is not None:
+        print(f"  • Forecast MAE (Prophet): {forecast_results['prophet']['metrics']['mae']:.2f} trips")
+    elif 'sarima' in forecast_results and forecast_results['sarima']['metrics'] is not None:
+        print(f"  • Forecast MAE (SARIMA): {forecast_results['sarima']['metrics']['mae']:.2f} trips")
+
+    print("\nGenerated Files:")
+    print(f"  • Report: {report_path}")
+    print(f"  • Visualizations: {config.VIZ_DIR}/")
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,7 @@ DATA_DIR = os.path.join(BASE_DIR, 'data')
 PROCESSED_DIR = os.path.join(BASE_DIR, 'processed_data')
 VIZ_DIR = os.path.join(BASE_DIR, 'visualizations')
 REPORTS_DIR = os.path.join(BASE_DIR, 'reports')
+ML_CACHE_DIR = os.path.join(PROCESSED_DIR, 'ml_cache')  # Fitted model outputs reused between runs
 
 # Visualization subdirectories
 VIZ_TIME_SERIES = os.path.join(VIZ_DIR, 'time_series')
@@ -22,9 +23,10 @@ VIZ_MAPS = os.path.join(VIZ_DIR, 'maps')
 VIZ_ML = os.path.join(VIZ_DIR, 'ml')
 
 # Plot settings
-PLOT_DPI = 300
+PLOT_DPI = 150  # Reports render at <=100 dpi; PNG encoding scales with pixel count
 PLOT_STYLE = 'seaborn-v0_8-darkgrid'
 PLOT_PALETTE = 'husl'
+MAX_SCATTER_POINTS = 100_000  # Larger point clouds are subsampled for drawing
 
 # Color schemes
 COLORS = {
@@ -41,6 +43,39 @@ COLORS = {
 PEAK_THRESHOLD = 0.8  # For identifying peak hours
 MIN_TRIPS_THRESHOLD = 10  # Minimum trips for station analysis
 
+# Text columns analysed as categoricals (grouped on integer codes)
+CATEGORY_COLUMNS = ['startstationname', 'endstationname', 'Membership', 'CycleType', 'time_period']
+
+# Timestamp format of exported datetime columns (skips format inference)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Compact numeric dtypes enforced at load (halves bytes scanned by aggregations)
+NUMERIC_DTYPES = {
+    'unlock_hour': 'uint8',
+    'unlock_dayofweek': 'uint8',
+    'unlock_month': 'uint8',
+    'unlock_day': 'uint8',
+    'is_weekend': 'uint8',
+    'duration_minutes_calculated': 'float32',
+    'length': 'float32',
+    'costs': 'float32'
+}
+
+# Compact coordinate dtypes enforced when reading locations
+LOCATIONS_DTYPES = {
+    'latitude': 'float32',
+    'longitude': 'float32'
+}
+
+# Station name columns (categoricals sharing one category set)
+STATION_COLUMNS = ['startstationname', 'endstationname']
+
+# Locations columns used by the analyses (GPS endpoints and heatmap)
+LOCATIONS_COLUMNS = ['route_code', 'latitude', 'longitude']
+LOCATIONS_BATCH_SIZE = 2_000_000  # GPS points held in memory while streaming
+HEATMAP_SAMPLE_STEP = 100  # Keep every Nth GPS point for the heatmap
+HEATMAP_COLUMNS = ['latitude', 'longitude']  # Columns kept in the heatmap sample
+
 # Day names
 DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
 
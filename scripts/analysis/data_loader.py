@@ -6,8 +6,44 @@ Functions for loading and preprocessing data.
 """
 
 import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
 import os
 from . import config
+from .utils.aggregation import count_distinct, run_bounds
+
+
+def _processed_parquet_path(name, csv_dtypes, csv_dates):
+    """
+    Resolve a processed Parquet file, converting a legacy CSV export once.
+
+    Older runs of 01_data_preprocessing.py wrote CSV only. If such a CSV is
+    present and newer than the Parquet file, it is parsed a single time
+    (explicit dtypes, fixed-format dates parsed by read_csv) and saved as Parquet, so
+    later loads are typed reads with no string parsing.
+
+    Args:
+        name (str): File stem inside PROCESSED_DIR (e.g. 'routes_cleaned')
+        csv_dtypes (dict): Column dtypes for the CSV fallback
+        csv_dates (list): Datetime columns for the CSV fallback
+
+    Returns:
+        str: Path of the Parquet file (may not exist if neither file does)
+    """
+    parquet_path = os.path.join(config.PROCESSED_DIR, f'{name}.parquet')
+    csv_path = os.path.join(config.PROCESSED_DIR, f'{name}.csv')
+
+    if os.path.exists(csv_path) and (
+        not os.path.exists(parquet_path)
+        or os.path.getmtime(csv_path) > os.path.getmtime(parquet_path)
+    ):
+        # Fixed format, and each distinct timestamp string is parsed only once
+        df = pd.read_csv(csv_path, dtype=csv_dtypes, parse_dates=csv_dates,
+                         date_format=config.DATETIME_FORMAT, cache_dates=True)
+        df.to_parquet(parquet_path, engine='pyarrow', compression='zstd',
+                      row_group_size=10_000, index=False)
+
+    return parquet_path
 
 
 def load_routes_data():
@@ -15,9 +51,13 @@ def load_routes_data():
     Load cleaned routes data.
 
     Returns:
-        pd.DataFrame: Routes dataframe with datetime columns parsed
+        pd.DataFrame: Routes dataframe with datetime, categorical and narrow numeric dtypes
     """
-    file_path = os.path.join(config.PROCESSED_DIR, 'routes_cleaned.csv')
+    file_path = _processed_parquet_path(
+        'routes_cleaned',
+        csv_dtypes={**{col: 'category' for col in config.CATEGORY_COLUMNS}, **config.NUMERIC_DTYPES},
+        csv_dates=['unlock_datetime', 'lock_datetime']
+    )
 
     if not os.path.exists(file_path):
         raise FileNotFoundError(
@@ -25,23 +65,50 @@ def load_routes_data():
             "Please run 01_data_preprocessing.py first."
         )
 
-    routes = pd.read_csv(file_path)
+    routes = pd.read_parquet(file_path, engine='pyarrow')
+
+    # Older processed files may predate the hour column
+    if 'unlock_hour' not in routes.columns:
+        routes['unlock_hour'] = routes['unlock_datetime'].dt.hour
+
+    # Narrow numeric columns (no copy for columns already stored narrow)
+    routes = routes.astype(config.NUMERIC_DTYPES, copy=False)
 
-    # Parse datetime columns
-    routes['unlock_datetime'] = pd.to_datetime(routes['unlock_datetime'])
-    routes['lock_datetime'] = pd.to_datetime(routes['lock_datetime'])
+    # Text columns are grouped on category codes (no-op if already stored so)
+    for col in config.CATEGORY_COLUMNS:
+        routes[col] = routes[col].astype('category')
+
+    # Row groups may carry different dictionaries; give start/end stations
+    # one shared category set again so they stay comparable
+    stations = routes['startstationname'].cat.categories.union(
+        routes['endstationname'].cat.categories
+    )
+    for col in config.STATION_COLUMNS:
+        routes[col] = routes[col].cat.set_categories(stations)
 
     return routes
 
 
-def load_locations_data():
+def _locations_parquet_path():
+    """Resolve the cleaned locations Parquet file (see _processed_parquet_path)."""
+    return _processed_parquet_path(
+        'locations_cleaned',
+        csv_dtypes=config.LOCATIONS_DTYPES,
+        csv_dates=['coord_datetime']
+    )
+
+
+def load_locations_data(columns=None):
     """
     Load cleaned locations data.
 
+    Args:
+        columns (list): Columns to read (default: all columns)
+
     Returns:
-        pd.DataFrame: Locations dataframe with datetime columns parsed
+        pd.DataFrame: Locations dataframe with datetime and float32 coordinate dtypes
     """
-    file_path = os.path.join(config.PROCESSED_DIR, 'locations_cleaned.csv')
+    file_path = _locations_parquet_path()
 
     if not os.path.exists(file_path):
         raise FileNotFoundError(
@@ -49,35 +116,179 @@ def load_locations_data():
             "Please run 01_data_preprocessing.py first."
         )
 
-    locations = pd.read_csv(file_path)
-
-    # Parse datetime columns
-    locations['coord_datetime'] = pd.to_datetime(locations['coord_datetime'])
+    locations = pd.read_parquet(file_path, engine='pyarrow', columns=columns)
+    locations = locations.astype(
+        {col: dtype for col, dtype in config.LOCATIONS_DTYPES.items() if col in locations.columns},
+        copy=False
+    )
 
     return locations
 
 
-def get_data_summary(routes, locations):
+def summarize_locations(batch_size=None, sample_step=None):
+    """
+    Stream the cleaned locations file and keep only what the EDA uses.
+
+    The file is read in record batches, so peak memory is one batch
+    rather than every GPS point. Endpoints and sample are cached as small
+    Parquet files next to it and reused until the locations file changes.
+
+    Args:
+        batch_size (int): GPS points per batch (default: config.LOCATIONS_BATCH_SIZE)
+        sample_step (int): Keep every Nth point (default: config.HEATMAP_SAMPLE_STEP)
+
+    Returns:
+        dict: total_gps_points, route_endpoints (see get_route_endpoints)
+              and sample (every Nth point, HEATMAP_COLUMNS only)
+    """
+    batch_size = batch_size or config.LOCATIONS_BATCH_SIZE
+    sample_step = sample_step or config.HEATMAP_SAMPLE_STEP
+    file_path = _locations_parquet_path()
+
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(
+            f"Locations data not found at {file_path}. "
+            "Please run 01_data_preprocessing.py first."
+        )
+
+    parquet_file = pq.ParquetFile(file_path)
+    endpoints_path = os.path.join(config.PROCESSED_DIR, 'locations_endpoints.parquet')
+    sample_path = os.path.join(config.PROCESSED_DIR, f'locations_sample_{sample_step}.parquet')
+
+    if all(os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(file_path)
+           for path in (endpoints_path, sample_path)):
+        return {
+            'total_gps_points': parquet_file.metadata.num_rows,
+            'route_endpoints': pd.read_parquet(endpoints_path, engine='pyarrow'),
+            'sample': pd.read_parquet(sample_path, engine='pyarrow', columns=config.HEATMAP_COLUMNS)
+        }
+
+    total_points = 0
+    endpoints = []
+    samples = []
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=config.LOCATIONS_COLUMNS):
+        chunk = batch.to_pandas().astype(config.LOCATIONS_DTYPES, copy=False)
+        endpoints.append(get_route_endpoints(chunk))
+        # Continue the global every-Nth-point sequence across batches
+        samples.append(chunk[config.HEATMAP_COLUMNS].iloc[(-total_points) % sample_step::sample_step])
+        total_points += len(chunk)
+
+    route_endpoints = pd.concat(endpoints, ignore_index=True)
+    if len(endpoints) > 1:
+        # A route split across batches keeps its first start and last end
+        # (rows are in batch order, so plain de-duplication is enough)
+        starts = route_endpoints.drop_duplicates('route_code', keep='first')
+        ends = route_endpoints.drop_duplicates('route_code', keep='last')
+        route_endpoints = starts[['route_code', 'start_lat', 'start_lon']].merge(
+            ends[['route_code', 'end_lat', 'end_lon']], on='route_code'
+        )[['route_code', 'start_lat', 'end_lat', 'start_lon', 'end_lon']]
+
+    sample = pd.concat(samples, ignore_index=True)
+
+    route_endpoints.to_parquet(endpoints_path, engine='pyarrow', compression='zstd', index=False)
+    sample.to_parquet(sample_path, engine='pyarrow', compression='zstd', index=False)
+
+    return {
+        'total_gps_points': total_points,
+        'route_endpoints': route_endpoints,
+        'sample': sample
+    }
+
+
+def get_od_codes(routes):
+    """
+    Encode each trip's (start, end) station pair as one integer.
+
+    The code is start_code * n_stations + end_code over the shared station
+    categories, so pairs can be counted without building label strings.
+
+    Args:
+        routes (pd.DataFrame): Routes dataframe with categorical station columns
+
+    Returns:
+        tuple: (od_codes int64 array, -1 where a station is missing; station categories)
+    """
+    stations = routes['startstationname'].cat.categories
+    start_codes = routes['startstationname'].cat.codes.to_numpy().astype(np.int64)
+    end_codes = routes['endstationname'].cat.codes.to_numpy().astype(np.int64)
+
+    od_codes = start_codes * len(stations) + end_codes
+    od_codes[(start_codes < 0) | (end_codes < 0)] = -1
+
+    return od_codes, stations
+
+
+def decode_od_codes(od_codes, stations):
+    """
+    Map integer OD codes back to (origin, destination) station names.
+
+    Args:
+        od_codes (array-like): Codes from get_od_codes
+        stations (pd.Index): Station categories from get_od_codes
+
+    Returns:
+        tuple: (origin names, destination names) as arrays
+    """
+    origin, destination = np.divmod(np.asarray(od_codes), len(stations))
+    return stations.to_numpy()[origin], stations.to_numpy()[destination]
+
+
+def get_route_endpoints(locations):
+    """
+    Get the first and last GPS fix of every route.
+
+    Rows are grouped by sorting route_code (a no-op when the file is
+    already ordered) and slicing at the run boundaries, instead of
+    hashing every point in a groupby.
+
+    Args:
+        locations (pd.DataFrame): Locations dataframe (route_code, latitude, longitude)
+
+    Returns:
+        pd.DataFrame: route_code, start_lat, end_lat, start_lon, end_lon
+    """
+    codes = locations['route_code'].to_numpy()
+    lat = locations['latitude'].to_numpy()
+    lon = locations['longitude'].to_numpy()
+
+    # Stable sort keeps the recorded point order within each route
+    if not locations['route_code'].is_monotonic_increasing:
+        order = np.argsort(codes, kind='stable')
+        codes, lat, lon = codes[order], lat[order], lon[order]
+
+    first, last = run_bounds(codes)
+
+    return pd.DataFrame({
+        'route_code': codes[first],
+        'start_lat': lat[first],
+        'end_lat': lat[last],
+        'start_lon': lon[first],
+        'end_lon': lon[last]
+    })
+
+
+def get_data_summary(routes, total_gps_points):
     """
     Get summary statistics for the datasets.
 
     Args:
         routes (pd.DataFrame): Routes dataframe
-        locations (pd.DataFrame): Locations dataframe
+        total_gps_points (int): Number of GPS points in the locations data
 
     Returns:
         dict: Summary statistics
     """
     summary = {
         'total_trips': len(routes),
-        'total_gps_points': len(locations),
+        'total_gps_points': total_gps_points,
         'date_range': (
             routes['unlock_datetime'].min().date(),
             routes['unlock_datetime'].max().date()
         ),
-        'unique_bikes': routes['cyclenumber'].nunique(),
-        'unique_stations': routes['startstationname'].nunique(),
-        'unique_memberships': routes['Membership'].nunique(),
+        'unique_bikes': count_distinct(routes['cyclenumber']),
+        'unique_stations': count_distinct(routes['startstationname']),
+        'unique_memberships': count_distinct(routes['Membership']),
         'avg_trip_duration': routes['duration_minutes_calculated'].mean(),
         'avg_trip_distance': routes['length'].mean()
     }
@@ -14,51 +14,98 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
 from . import config
+from .data_loader import get_od_codes
+from .utils import aggregation
+
+# Leaflet marker for a FastMarkerCluster station row
+# [lat, lon, name, total_trips, start_trips, end_trips]
+_STATION_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: Math.log1p(row[3]) * 2,
+        color: 'blue',
+        fill: true,
+        fillColor: 'lightblue',
+        fillOpacity: 0.6
+    });
+    marker.bindPopup('<b>' + row[2] + '</b><br>Total Trips: ' + row[3].toLocaleString('en-US') +
+                     '<br>Starts: ' + row[4].toLocaleString('en-US') +
+                     '<br>Ends: ' + row[5].toLocaleString('en-US'));
+    marker.bindTooltip(row[2]);
+    return marker;
+};
+"""
 
 
-def create_station_map(routes, locations):
+def join_route_coords(routes, route_coords):
     """
-    Create an interactive map showing all bike stations.
+    Attach each route's first/last GPS fix to its stations (done once per run).
 
     Args:
         routes (pd.DataFrame): Routes dataframe
-        locations (pd.DataFrame): Locations dataframe with GPS coordinates
+        route_coords (pd.DataFrame): First/last GPS fix per route (get_route_endpoints)
+
+    Returns:
+        pd.DataFrame: route_code, station columns and start/end coordinates
+    """
+    return routes[['route_code', 'startstationname', 'endstationname']].merge(
+        route_coords, on='route_code', how='left'
+    )
+
+
+def build_station_stats(routes_with_coords):
+    """
+    Count trips and average GPS endpoints per station (shared by the maps and charts).
+
+    Start and end stations share one category set, so every statistic is a
+    bincount over the same integer codes; first/last GPS fixes of each
+    route approximate station locations.
+
+    Args:
+        routes_with_coords (pd.DataFrame): Routes joined with GPS endpoints (join_route_coords)
+
+    Returns:
+        pd.DataFrame: One row per station category (in category order) with
+                      start_trips, end_trips, start_lat, start_lon, end_lat, end_lon
+    """
+    stations = routes_with_coords['startstationname'].cat.categories
+    start_codes = routes_with_coords['startstationname'].cat.codes.to_numpy()
+    end_codes = routes_with_coords['endstationname'].cat.codes.to_numpy()
+
+    def coord_means(codes, column):
+        # Averaged in float64, stored float32 like the GPS columns
+        return aggregation.bin_means(
+            codes, routes_with_coords[column].to_numpy(dtype=np.float64), len(stations)
+        ).astype(np.float32)
+
+    return pd.DataFrame({
+        'station': stations,
+        'start_trips': np.bincount(start_codes[start_codes >= 0], minlength=len(stations)),
+        'end_trips': np.bincount(end_codes[end_codes >= 0], minlength=len(stations)),
+        'start_lat': coord_means(start_codes, 'start_lat'),
+        'start_lon': coord_means(start_codes, 'start_lon'),
+        'end_lat': coord_means(end_codes, 'end_lat'),
+        'end_lon': coord_means(end_codes, 'end_lon')
+    })
+
+
+def create_station_map(station_stats):
+    """
+    Create an interactive map showing all bike stations.
+
+    Args:
+        station_stats (pd.DataFrame): Per-station counts and coordinates (build_station_stats)
 
     Returns:
         tuple: (folium.Map, filepath, report_lines)
     """
-    # Get station trip counts
-    start_counts = routes['startstationname'].value_counts()
-    end_counts = routes['endstationname'].value_counts()
-
-    # Merge to get total trips per station
-    station_trips = pd.DataFrame({
-        'start_trips': start_counts,
-        'end_trips': end_counts
-    }).fillna(0)
-    station_trips['total_trips'] = station_trips['start_trips'] + station_trips['end_trips']
-    station_trips = station_trips.reset_index()
-    station_trips.columns = ['station', 'start_trips', 'end_trips', 'total_trips']
-
-    # Get first/last GPS coordinates for each route to approximate station locations
-    route_coords = locations.groupby('route_code').agg({
-        'latitude': ['first', 'last'],
-        'longitude': ['first', 'last']
-    }).reset_index()
-    route_coords.columns = ['route_code', 'start_lat', 'end_lat', 'start_lon', 'end_lon']
-
-    # Merge with routes
-    routes_with_coords = routes.merge(route_coords, on='route_code', how='left')
-
-    # Get average coordinates for each station
-    start_stations = routes_with_coords.groupby('startstationname').agg({
-        'start_lat': 'mean',
-        'start_lon': 'mean'
-    }).reset_index()
-    start_stations.columns = ['station', 'lat', 'lon']
-
-    # Merge with trip counts
-    station_stats = start_stations.merge(station_trips, on='station', how='inner')
+    # Stations that start trips, placed at their mean GPS start fix
+    station_stats = station_stats[station_stats['start_trips'] > 0].rename(
+        columns={'start_lat': 'lat', 'start_lon': 'lon'}
+    )
+    station_stats = station_stats.assign(
+        total_trips=station_stats['start_trips'] + station_stats['end_trips']
+    )
 
     # Remove stations with invalid coordinates
     station_stats = station_stats[
@@ -66,7 +113,7 @@ def create_station_map(routes, locations):
         (station_stats['lon'] > 0) &
         (station_stats['lat'] < 90) &
         (station_stats['lon'] < 180)
-    ]
+    ].reset_index(drop=True)
 
     # Create base map centered on Tartu
     center_lat = station_stats['lat'].mean()
@@ -75,27 +122,26 @@ def create_station_map(routes, locations):
     m = folium.Map(
         location=[center_lat, center_lon],
         zoom_start=13,
-        tiles='OpenStreetMap'
+        tiles='OpenStreetMap',
+        prefer_canvas=True
     )
 
-    # Add station markers with popup info
-    for _, row in station_stats.iterrows():
-        # Size marker based on trip count
-        radius = np.log1p(row['total_trips']) * 2
-
-        folium.CircleMarker(
-            location=[row['lat'], row['lon']],
-            radius=radius,
-            popup=f"<b>{row['station']}</b><br>Total Trips: {int(row['total_trips']):,}<br>Starts: {int(row['start_trips']):,}<br>Ends: {int(row['end_trips']):,}",
-            tooltip=row['station'],
-            color='blue',
-            fill=True,
-            fillColor='lightblue',
-            fillOpacity=0.6
-        ).add_to(m)
-
-    # Add layer control
-    folium.LayerControl().add_to(m)
+    # Station markers are built client-side from one data array and
+    # clustered when zoomed out; at the initial zoom every station shows
+    station_rows = [
+        [float(lat), float(lon), str(name), int(total), int(starts), int(ends)]
+        for lat, lon, name, total, starts, ends in zip(
+            station_stats['lat'].to_numpy(), station_stats['lon'].to_numpy(),
+            station_stats['station'].to_numpy(), station_stats['total_trips'].to_numpy(),
+            station_stats['start_trips'].to_numpy(), station_stats['end_trips'].to_numpy()
+        )
+    ]
+    plugins.FastMarkerCluster(
+        data=station_rows,
+        callback=_STATION_MARKER_CALLBACK,
+        name='Stations',
+        options={'disableClusteringAtZoom': 13}
+    ).add_to(m)
 
     # Save map
     filepath = os.path.join(config.VIZ_DIR, 'interactive_station_map.html')
@@ -111,47 +157,61 @@ def create_station_map(routes, locations):
     return m, filepath, report_lines
 
 
-def create_trip_flow_map(routes, locations, top_n=20):
+def build_top_routes(routes_with_coords, station_stats, top_n=20):
     """
-    Create an interactive map showing trip flows between stations.
+    Find the most frequent station-to-station routes with their coordinates.
 
     Args:
-        routes (pd.DataFrame): Routes dataframe
-        locations (pd.DataFrame): Locations dataframe
-        top_n (int): Number of top routes to show
+        routes_with_coords (pd.DataFrame): Routes joined with GPS endpoints (join_route_coords)
+        station_stats (pd.DataFrame): Per-station counts and coordinates (build_station_stats)
+        top_n (int): Number of routes to return
 
     Returns:
-        tuple: (folium.Map, filepath, report_lines)
+        pd.DataFrame: Station names, start/end coordinates and trip count per route,
+                      most frequent first
     """
-    # Get route coordinates
-    route_coords = locations.groupby('route_code').agg({
-        'latitude': ['first', 'last'],
-        'longitude': ['first', 'last']
-    }).reset_index()
-    route_coords.columns = ['route_code', 'start_lat', 'end_lat', 'start_lon', 'end_lon']
-
-    # Merge with routes
-    routes_with_coords = routes.merge(route_coords, on='route_code', how='left')
-
-    # Get top routes by OD pair
-    route_counts = routes_with_coords.groupby([
-        'startstationname', 'start_lat', 'start_lon',
-        'endstationname', 'end_lat', 'end_lon'
-    ]).size().reset_index(name='count')
-
-    # Filter valid coordinates
-    route_counts = route_counts[
-        (route_counts['start_lat'] > 0) &
-        (route_counts['start_lon'] > 0) &
-        (route_counts['end_lat'] > 0) &
-        (route_counts['end_lon'] > 0) &
-        (route_counts['start_lat'] < 90) &
-        (route_counts['end_lat'] < 90)
-    ]
+    # Station coordinates: mean GPS start fix per origin station and mean
+    # end fix per destination station, indexed by shared category code, as
+    # C-contiguous (lat, lon) rows so per-route gathers read adjacent pairs
+    od_codes, stations = get_od_codes(routes_with_coords)
+    origin_coords = np.ascontiguousarray(station_stats[['start_lat', 'start_lon']].to_numpy(np.float32))
+    dest_coords = np.ascontiguousarray(station_stats[['end_lat', 'end_lon']].to_numpy(np.float32))
+
+    # Only pairs whose stations have valid coordinates
+    valid_origin = (origin_coords[:, 0] > 0) & (origin_coords[:, 1] > 0) & (origin_coords[:, 0] < 90)
+    valid_dest = (dest_coords[:, 0] > 0) & (dest_coords[:, 1] > 0) & (dest_coords[:, 0] < 90)
+    origin_codes, dest_codes = np.divmod(np.maximum(od_codes, 0), len(stations))
+    keep = (od_codes >= 0) & valid_origin[origin_codes] & valid_dest[dest_codes]
+
+    # Get top routes by counting single integer OD codes
+    top_codes, top_counts = aggregation.top_counts(
+        np.where(keep, od_codes, -1), top_n, minlength=len(stations) ** 2
+    )
+    top_codes, top_counts = top_codes[top_counts > 0], top_counts[top_counts > 0]
+    origin_codes, dest_codes = np.divmod(top_codes, len(stations))
+
+    return pd.DataFrame({
+        'startstationname': stations[origin_codes],
+        'start_lat': origin_coords[origin_codes, 0],
+        'start_lon': origin_coords[origin_codes, 1],
+        'endstationname': stations[dest_codes],
+        'end_lat': dest_coords[dest_codes, 0],
+        'end_lon': dest_coords[dest_codes, 1],
+        'count': top_counts
+    })
 
-    # Get top routes
-    top_routes = route_counts.nlargest(top_n, 'count')
 
+def create_trip_flow_map(top_routes, top_n=20):
+    """
+    Create an interactive map showing trip flows between stations.
+
+    Args:
+        top_routes (pd.DataFrame): Most frequent routes (build_top_routes)
+        top_n (int): Number of top routes requested
+
+    Returns:
+        tuple: (folium.Map, filepath, report_lines)
+    """
     # Create base map
     center_lat = top_routes['start_lat'].mean()
     center_lon = top_routes['start_lon'].mean()
@@ -159,35 +219,64 @@ def create_trip_flow_map(routes, locations, top_n=20):
     m = folium.Map(
         location=[center_lat, center_lon],
         zoom_start=13,
-        tiles='CartoDB positron'
+        tiles='CartoDB positron',
+        prefer_canvas=True
     )
 
-    # Add flow lines
-    for _, row in top_routes.iterrows():
-        # Line thickness based on trip count
-        weight = np.log1p(row['count']) * 1.5
-
-        # Create line
-        folium.PolyLine(
-            locations=[
-                [row['start_lat'], row['start_lon']],
-                [row['end_lat'], row['end_lon']]
-            ],
-            color='red',
-            weight=weight,
-            opacity=0.6,
-            popup=f"{row['startstationname']} → {row['endstationname']}<br>Trips: {row['count']:,}",
-            tooltip=f"{row['count']:,} trips"
-        ).add_to(m)
-
-        # Add arrow marker at end
-        folium.CircleMarker(
-            location=[row['end_lat'], row['end_lon']],
-            radius=3,
-            color='red',
-            fill=True,
-            fillColor='red'
-        ).add_to(m)
+    # Flow lines as one GeoJSON layer (one map child instead of one per route)
+    counts = top_routes['count'].to_numpy(np.int64)
+    weights = np.log1p(counts) * 1.5  # Line thickness based on trip count
+    folium.GeoJson(
+        {
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {
+                        'type': 'LineString',
+                        'coordinates': [[float(start_lon), float(start_lat)],
+                                        [float(end_lon), float(end_lat)]]
+                    },
+                    'properties': {
+                        'route': f"{origin} → {destination}<br>Trips: {count:,}",
+                        'trips': f"{count:,} trips",
+                        'weight': float(weight)
+                    }
+                }
+                for origin, destination, start_lat, start_lon, end_lat, end_lon, count, weight in zip(
+                    top_routes['startstationname'].to_numpy(), top_routes['endstationname'].to_numpy(),
+                    top_routes['start_lat'].to_numpy(), top_routes['start_lon'].to_numpy(),
+                    top_routes['end_lat'].to_numpy(), top_routes['end_lon'].to_numpy(),
+                    counts, weights
+                )
+            ]
+        },
+        style_function=lambda feature: {
+            'color': 'red',
+            'weight': feature['properties']['weight'],
+            'opacity': 0.6
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['trips'], labels=False),
+        popup=folium.GeoJsonPopup(fields=['route'], labels=False),
+        name='Flows'
+    ).add_to(m)
+
+    # Arrow markers at route ends, drawn as one GeoJSON layer
+    folium.GeoJson(
+        {
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [float(lon), float(lat)]},
+                    'properties': {}
+                }
+                for lat, lon in zip(top_routes['end_lat'].to_numpy(), top_routes['end_lon'].to_numpy())
+            ]
+        },
+        marker=folium.CircleMarker(radius=3, color='red', fill=True, fill_color='red'),
+        name='Route ends'
+    ).add_to(m)
 
     # Save map
     filepath = os.path.join(config.VIZ_DIR, 'interactive_trip_flow.html')
@@ -203,37 +292,38 @@ def create_trip_flow_map(routes, locations, top_n=20):
     return m, filepath, report_lines
 
 
-def create_heatmap_animation(locations):
+def create_heatmap_animation(sample_locations, sample_step=None):
     """
     Create an animated heatmap of GPS points over time.
 
     Args:
-        locations (pd.DataFrame): Locations dataframe
+        sample_locations (pd.DataFrame): Sampled GPS points (summarize_locations)
+        sample_step (int): Sampling rate the points were drawn with
 
     Returns:
         tuple: (folium.Map, filepath, report_lines)
     """
-    # Sample data for performance (use every 100th point)
-    sample_locations = locations.iloc[::100].copy()
+    sample_step = sample_step or config.HEATMAP_SAMPLE_STEP
 
-    # Filter valid coordinates
-    sample_locations = sample_locations[
-        (sample_locations['latitude'] > 0) &
-        (sample_locations['longitude'] > 0)
-    ]
+    # Filter valid coordinates on the two NumPy columns (no frame copies)
+    lat = sample_locations['latitude'].to_numpy()
+    lon = sample_locations['longitude'].to_numpy()
+    valid = (lat > 0) & (lon > 0)
+    lat, lon = lat[valid], lon[valid]
 
     # Create base map
-    center_lat = sample_locations['latitude'].mean()
-    center_lon = sample_locations['longitude'].mean()
+    center_lat = float(lat.mean())
+    center_lon = float(lon.mean())
 
     m = folium.Map(
         location=[center_lat, center_lon],
         zoom_start=12,
-        tiles='OpenStreetMap'
+        tiles='OpenStreetMap',
+        prefer_canvas=True
     )
 
     # Prepare data for heatmap
-    heat_data = sample_locations[['latitude', 'longitude']].values.tolist()
+    heat_data = np.column_stack([lat, lon]).tolist()
 
     # Add heatmap layer
     plugins.HeatMap(
@@ -248,8 +338,8 @@ def create_heatmap_animation(locations):
     m.save(filepath)
 
     report_lines = [
-        f"**GPS Points Visualized**: {len(sample_locations):,}",
-        f"**Sampling Rate**: 1 in 100 points",
+        f"**GPS Points Visualized**: {len(lat):,}",
+        f"**Sampling Rate**: 1 in {sample_step} points",
         f"**Map Center**: ({center_lat:.4f}, {center_lon:.4f})",
         ""
     ]
@@ -257,23 +347,40 @@ def create_heatmap_animation(locations):
     return m, filepath, report_lines
 
 
-def create_interactive_hourly_chart(routes):
+def build_hourly_stats(routes):
     """
-    Create an interactive hourly trip pattern chart using Plotly.
+    Count trips and average duration/distance per hour of day.
 
     Args:
         routes (pd.DataFrame): Routes dataframe
 
+    Returns:
+        pd.DataFrame: hour, trip_count, avg_duration, avg_distance for hours with trips
+    """
+    # 24 bins over the uint8 hour column
+    hours = routes['unlock_hour'].to_numpy(dtype=np.intp)
+    trip_count = np.bincount(hours, minlength=24)
+    hourly = pd.DataFrame({
+        'hour': np.arange(trip_count.size),
+        'trip_count': trip_count,
+        'avg_duration': aggregation.bin_means(
+            hours, routes['duration_minutes_calculated'].to_numpy(dtype=np.float64), 24),
+        'avg_distance': aggregation.bin_means(
+            hours, routes['length'].to_numpy(dtype=np.float64), 24)
+    })
+    return hourly[hourly['trip_count'] > 0].reset_index(drop=True)
+
+
+def create_interactive_hourly_chart(hourly):
+    """
+    Create an interactive hourly trip pattern chart using Plotly.
+
+    Args:
+        hourly (pd.DataFrame): Hourly trip statistics (build_hourly_stats)
+
     Returns:
         tuple: (plotly.Figure, filepath, report_lines)
     """
-    # Aggregate by hour
-    hourly = routes.groupby('unlock_hour').agg({
-        'route_code': 'count',
-        'duration_minutes_calculated': 'mean',
-        'length': 'mean'
-    }).reset_index()
-    hourly.columns = ['hour', 'trip_count', 'avg_duration', 'avg_distance']
 
     # Create figure with secondary y-axis
     fig = make_subplots(
@@ -346,25 +453,23 @@ def create_interactive_hourly_chart(routes):
     return fig, filepath, report_lines
 
 
-def create_interactive_station_chart(routes):
+def create_interactive_station_chart(station_stats):
     """
     Create an interactive station popularity chart using Plotly.
 
     Args:
-        routes (pd.DataFrame): Routes dataframe
+        station_stats (pd.DataFrame): Per-station counts and coordinates (build_station_stats)
 
     Returns:
         tuple: (plotly.Figure, filepath, report_lines)
     """
-    # Top 15 stations
-    top_starts = routes['startstationname'].value_counts().head(15)
-    top_ends = routes['endstationname'].value_counts().head(15)
+    # Top 15 start stations
+    top = aggregation.top_indices(station_stats['start_trips'].to_numpy(), 15)
 
-    # Combine data
     station_data = pd.DataFrame({
-        'Station': top_starts.index,
-        'Starts': top_starts.values,
-        'Ends': [top_ends.get(s, 0) for s in top_starts.index]
+        'Station': station_stats['station'].to_numpy()[top],
+        'Starts': station_stats['start_trips'].to_numpy()[top],
+        'Ends': station_stats['end_trips'].to_numpy()[top]
     })
 
     # Create grouped bar chart
@@ -416,7 +521,7 @@ def run_interactive_visualizations(routes, locations, report):
 
     Args:
         routes (pd.DataFrame): Routes dataframe
-        locations (pd.DataFrame): Locations dataframe
+        locations (dict): Streamed locations summary (summarize_locations)
         report (MarkdownReport): Report object
 
     Returns:
@@ -427,51 +532,51 @@ def run_interactive_visualizations(routes, locations, report):
 
     results = {}
 
+    # Per-station aggregates shared by the station map, flow map and station chart
+    routes_with_coords = join_route_coords(routes, locations['route_endpoints'])
+    station_stats = build_station_stats(routes_with_coords)
+
     # Station map
     print("  • Creating interactive station map...")
-    station_map, filepath, report_lines = create_station_map(routes, locations)
+    station_map, filepath, report_lines = create_station_map(station_stats)
     results['station_map'] = {'map': station_map, 'filepath': filepath}
 
     report.add_section("Interactive Visualizations")
     report.add_subsection("Station Map")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     # Trip flow map
     print("  • Creating trip flow visualization...")
-    flow_map, filepath, report_lines = create_trip_flow_map(routes, locations, top_n=20)
+    top_routes = build_top_routes(routes_with_coords, station_stats, top_n=20)
+    flow_map, filepath, report_lines = create_trip_flow_map(top_routes, top_n=20)
     results['flow_map'] = {'map': flow_map, 'filepath': filepath}
 
     report.add_subsection("Trip Flow Map")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     # Heatmap
     print("  • Creating GPS density heatmap...")
-    heatmap, filepath, report_lines = create_heatmap_animation(locations)
+    heatmap, filepath, report_lines = create_heatmap_animation(locations['sample'])
     results['heatmap'] = {'map': heatmap, 'filepath': filepath}
 
     report.add_subsection("GPS Density Heatmap")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     # Interactive hourly chart
     print("  • Creating interactive hourly analysis...")
-    hourly_fig, filepath, report_lines = create_interactive_hourly_chart(routes)
+    hourly_fig, filepath, report_lines = create_interactive_hourly_chart(build_hourly_stats(routes))
     results['hourly_chart'] = {'figure': hourly_fig, 'filepath': filepath}
 
     report.add_subsection("Interactive Hourly Analysis")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     # Interactive station chart
     print("  • Creating interactive station analysis...")
-    station_fig, filepath, report_lines = create_interactive_station_chart(routes)
+    station_fig, filepath, report_lines = create_interactive_station_chart(station_stats)
     results['station_chart'] = {'figure': station_fig, 'filepath': filepath}
 
     report.add_subsection("Interactive Station Analysis")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     print(f"  ✓ Interactive visualizations complete")
     print(f"  ✓ Generated 5 interactive visualizations")
@@ -9,12 +9,55 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.preprocessing import StandardScaler
+from sklearn.cluster import MiniBatchKMeans
 from sklearn.ensemble import IsolationForest
 from sklearn.metrics import silhouette_score, davies_bouldin_score
+from joblib import Memory
 from . import config
-from .utils import plotting
+from .data_loader import get_od_codes, decode_od_codes
+from .utils import aggregation, plotting
+
+# Model outputs are cached on disk keyed by a hash of the scaled features
+# and parameters, so an unchanged dataset is not refitted on the next run
+_model_cache = Memory(config.ML_CACHE_DIR, mmap_mode='r', verbose=0)
+
+
+@_model_cache.cache
+def _kmeans_labels(features_scaled, n_clusters):
+    """Fit MiniBatchKMeans and return the cluster label of every row."""
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, batch_size=1024, n_init=3)
+    return kmeans.fit_predict(features_scaled)
+
+
+@_model_cache.cache
+def _isolation_forest_scores(features_scaled, contamination):
+    """Fit an Isolation Forest and return (score_samples, offset_)."""
+    # Trees fitted in parallel, each on 256 sampled trips; one scoring pass
+    iso_forest = IsolationForest(n_estimators=100, max_samples=256, contamination=contamination,
+                                 random_state=42, n_jobs=-1)
+    scores = iso_forest.fit(features_scaled).score_samples(features_scaled)
+    return scores, iso_forest.offset_
+
+
+def standardize_features(features):
+    """
+    Scale feature columns to zero mean and unit variance.
+
+    Same result as StandardScaler().fit_transform() (population std,
+    constant columns left unscaled), computed in NumPy without the
+    estimator's validation and returned as float32.
+
+    Args:
+        features (pd.DataFrame or np.ndarray): Feature matrix (rows x features)
+
+    Returns:
+        np.ndarray: C-contiguous float32 scaled features
+    """
+    values = np.ascontiguousarray(features, dtype=np.float32)
+    mean = values.mean(axis=0, dtype=np.float64)
+    std = values.std(axis=0, dtype=np.float64)
+    std[std == 0] = 1.0
+    return ((values - mean.astype(np.float32)) / std.astype(np.float32)).astype(np.float32, copy=False)
 
 
 def predict_hourly_demand(routes):
@@ -27,28 +70,26 @@ def predict_hourly_demand(routes):
     Returns:
         tuple: (predictions_df, visualization_paths, report_lines)
     """
-    # Aggregate hourly demand
-    hourly_demand = routes.groupby('unlock_hour').size()
+    # Aggregate hourly demand (dense 24-bin count over the uint8 hour column)
+    hourly_demand = np.bincount(routes['unlock_hour'].to_numpy(dtype=np.intp), minlength=24)[:24]
 
     # Calculate statistics for prediction
     predictions = pd.DataFrame({
-        'hour': range(24),
-        'historical_mean': [hourly_demand.get(h, 0) for h in range(24)]
+        'hour': np.arange(24),
+        'historical_mean': hourly_demand
     })
 
     # Simple moving average prediction (3-hour window)
-    predictions['predicted_demand'] = predictions['historical_mean'].rolling(
-        window=3, center=True, min_periods=1
-    ).mean()
+    predictions['predicted_demand'] = aggregation.centered_mean(hourly_demand, window=3)
 
-    # Calculate confidence intervals (based on std)
-    hourly_std = routes.groupby('unlock_hour')['route_code'].count().std()
+    # Calculate confidence intervals (based on std of the hours that have trips)
+    hourly_std = float(hourly_demand[hourly_demand > 0].std(ddof=1))
     predictions['lower_bound'] = predictions['predicted_demand'] - hourly_std
     predictions['upper_bound'] = predictions['predicted_demand'] + hourly_std
     predictions['lower_bound'] = predictions['lower_bound'].clip(lower=0)
 
     # Visualization
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig, ax = plt.subplots(figsize=(14, 6), layout='constrained')
 
     ax.plot(predictions['hour'], predictions['historical_mean'],
             marker='o', label='Historical', linewidth=2, markersize=6)
@@ -62,7 +103,6 @@ def predict_hourly_demand(routes):
     ax.set_ylabel('Number of Trips', fontsize=12)
     ax.legend()
     ax.grid(alpha=0.3)
-    plt.tight_layout()
 
     filepath = plotting.save_figure(fig, 'demand_prediction.png', 'ml')
 
@@ -87,46 +127,49 @@ def cluster_user_behavior(routes, n_clusters=3):
     Returns:
         tuple: (clustered_users, visualization_paths, report_lines)
     """
-    # Aggregate user features
-    user_features = routes.groupby('cyclenumber').agg({
-        'route_code': 'count',  # Trip frequency
-        'duration_minutes_calculated': 'mean',  # Avg duration
-        'length': ['mean', 'sum'],  # Avg and total distance
-        'unlock_hour': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.mean(),  # Preferred hour
-        'is_weekend': 'mean',  # Weekend preference
-        'costs': 'sum'  # Total cost
-    })
-
-    user_features.columns = ['trip_count', 'avg_duration', 'avg_distance',
-                             'total_distance', 'preferred_hour', 'weekend_ratio', 'total_cost']
+    # Aggregate user features (built-in reductions only)
+    user_features = routes.groupby('cyclenumber').agg(
+        trip_count=('route_code', 'count'),  # Trip frequency
+        avg_duration=('duration_minutes_calculated', 'mean'),  # Avg duration
+        avg_distance=('length', 'mean'),  # Avg distance
+        total_distance=('length', 'sum'),  # Total distance
+        weekend_ratio=('is_weekend', 'mean'),  # Weekend preference
+        total_cost=('costs', 'sum')  # Total cost
+    )
+
+    # Preferred hour: most frequent unlock hour per user from one user x hour
+    # histogram; argmax picks the earliest of tied hours, like mode()[0]
+    user_codes, users = pd.factorize(routes['cyclenumber'], sort=True)
+    hours = routes['unlock_hour'].to_numpy(dtype=np.intp)
+    valid = user_codes >= 0
+    hour_counts = np.bincount(user_codes[valid] * 24 + hours[valid], minlength=len(users) * 24)
+    user_features.insert(4, 'preferred_hour', hour_counts.reshape(len(users), 24).argmax(axis=1))
 
     # Normalize features
-    scaler = StandardScaler()
-    features_scaled = scaler.fit_transform(user_features)
-
-    # K-means clustering
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    user_features['cluster'] = kmeans.fit_predict(features_scaled)
-
-    # Calculate cluster statistics
-    cluster_stats = user_features.groupby('cluster').agg({
-        'trip_count': ['count', 'mean'],
-        'avg_duration': 'mean',
-        'avg_distance': 'mean',
-        'preferred_hour': 'mean',
-        'weekend_ratio': 'mean'
-    }).round(2)
+    features_scaled = standardize_features(user_features)
+
+    # K-means clustering (mini-batch updates instead of full Lloyd passes);
+    # labels stored as uint8 like the other small integer columns
+    user_features['cluster'] = _kmeans_labels(features_scaled, n_clusters).astype(np.uint8)
+
+    # Per-cluster sizes and means in one pass (heatmap and report)
+    cluster_summary = user_features.groupby('cluster').agg(
+        users=('trip_count', 'size'),
+        trip_count=('trip_count', 'mean'),
+        avg_duration=('avg_duration', 'mean'),
+        avg_distance=('avg_distance', 'mean')
+    )
 
     # Evaluation metrics
     silhouette = silhouette_score(features_scaled, user_features['cluster'])
     davies_bouldin = davies_bouldin_score(features_scaled, user_features['cluster'])
 
     # Visualization
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10), layout='constrained')
 
     # Cluster sizes
-    cluster_counts = user_features['cluster'].value_counts().sort_index()
-    axes[0, 0].bar(cluster_counts.index, cluster_counts.values,
+    cluster_counts = np.bincount(user_features['cluster'].to_numpy(), minlength=n_clusters)
+    axes[0, 0].bar(np.arange(n_clusters), cluster_counts,
                    color=[config.COLORS['primary'], config.COLORS['secondary'], config.COLORS['tertiary']][:n_clusters],
                    edgecolor='black')
     axes[0, 0].set_title('Cluster Sizes', fontweight='bold')
@@ -134,11 +177,22 @@ def cluster_user_behavior(routes, n_clusters=3):
     axes[0, 0].set_ylabel('Number of Users')
     axes[0, 0].grid(axis='y', alpha=0.3)
 
+    # Row positions of each cluster (one stable sort split at the cluster
+    # sizes) and the plotted columns as arrays, shared by both scatters
+    cluster_rows = np.split(np.argsort(user_features['cluster'].to_numpy(), kind='stable'),
+                            np.cumsum(cluster_counts)[:-1])
+    # Large clusters are drawn from a sample, split evenly across clusters
+    cluster_rows = [rows[plotting.sample_indices(len(rows), config.MAX_SCATTER_POINTS // n_clusters)]
+                    for rows in cluster_rows]
+    trip_count = user_features['trip_count'].to_numpy()
+    avg_duration = user_features['avg_duration'].to_numpy()
+    avg_distance = user_features['avg_distance'].to_numpy()
+    preferred_hour = user_features['preferred_hour'].to_numpy()
+
     # Trip count vs Duration (colored by cluster)
-    for cluster in range(n_clusters):
-        cluster_data = user_features[user_features['cluster'] == cluster]
-        axes[0, 1].scatter(cluster_data['trip_count'], cluster_data['avg_duration'],
-                          label=f'Cluster {cluster}', alpha=0.6, s=50)
+    for cluster, rows in enumerate(cluster_rows):
+        axes[0, 1].scatter(trip_count[rows], avg_duration[rows],
+                          label=f'Cluster {cluster}', alpha=0.6, s=50, rasterized=True)
     axes[0, 1].set_title('Trip Count vs Avg Duration', fontweight='bold')
     axes[0, 1].set_xlabel('Number of Trips')
     axes[0, 1].set_ylabel('Average Duration (minutes)')
@@ -146,10 +200,9 @@ def cluster_user_behavior(routes, n_clusters=3):
     axes[0, 1].grid(alpha=0.3)
 
     # Distance vs Hour (colored by cluster)
-    for cluster in range(n_clusters):
-        cluster_data = user_features[user_features['cluster'] == cluster]
-        axes[1, 0].scatter(cluster_data['preferred_hour'], cluster_data['avg_distance'],
-                          label=f'Cluster {cluster}', alpha=0.6, s=50)
+    for cluster, rows in enumerate(cluster_rows):
+        axes[1, 0].scatter(preferred_hour[rows], avg_distance[rows],
+                          label=f'Cluster {cluster}', alpha=0.6, s=50, rasterized=True)
     axes[1, 0].set_title('Preferred Hour vs Avg Distance', fontweight='bold')
     axes[1, 0].set_xlabel('Preferred Hour')
     axes[1, 0].set_ylabel('Average Distance (km)')
@@ -157,8 +210,7 @@ def cluster_user_behavior(routes, n_clusters=3):
     axes[1, 0].grid(alpha=0.3)
 
     # Cluster characteristics heatmap
-    cluster_means = user_features.groupby('cluster')[['trip_count', 'avg_duration',
-                                                       'avg_distance']].mean()
+    cluster_means = cluster_summary[['trip_count', 'avg_duration', 'avg_distance']]
     cluster_means_norm = (cluster_means - cluster_means.min()) / (cluster_means.max() - cluster_means.min())
 
     sns.heatmap(cluster_means_norm.T, annot=True, fmt='.2f', cmap='YlOrRd',
@@ -166,8 +218,8 @@ def cluster_user_behavior(routes, n_clusters=3):
     axes[1, 1].set_title('Cluster Characteristics (Normalized)', fontweight='bold')
     axes[1, 1].set_xlabel('Cluster')
     axes[1, 1].set_ylabel('Feature')
+    axes[1, 1].tick_params(axis='y', rotation=0)
 
-    plt.tight_layout()
     filepath = plotting.save_figure(fig, 'user_behavior_clustering.png', 'ml')
 
     # Report
@@ -177,13 +229,12 @@ def cluster_user_behavior(routes, n_clusters=3):
     report_lines.append(f"**Davies-Bouldin Index**: {davies_bouldin:.3f} (lower is better)")
     report_lines.append("")
 
-    for cluster in range(n_clusters):
-        cluster_data = user_features[user_features['cluster'] == cluster]
-        report_lines.append(f"**Cluster {cluster}**:")
-        report_lines.append(f"- Users: {len(cluster_data)}")
-        report_lines.append(f"- Avg trips: {cluster_data['trip_count'].mean():.1f}")
-        report_lines.append(f"- Avg duration: {cluster_data['avg_duration'].mean():.1f} min")
-        report_lines.append(f"- Avg distance: {cluster_data['avg_distance'].mean():.2f} km")
+    for row in cluster_summary.itertuples():
+        report_lines.append(f"**Cluster {row.Index}**:")
+        report_lines.append(f"- Users: {row.users}")
+        report_lines.append(f"- Avg trips: {row.trip_count:.1f}")
+        report_lines.append(f"- Avg duration: {row.avg_duration:.1f} min")
+        report_lines.append(f"- Avg distance: {row.avg_distance:.2f} km")
         report_lines.append("")
 
     return user_features, [filepath], report_lines
@@ -200,28 +251,38 @@ def detect_anomalies(routes, contamination=0.05):
     Returns:
         tuple: (routes_with_anomalies, visualization_paths, report_lines)
     """
-    # Select features for anomaly detection
-    features = routes[['duration_minutes_calculated', 'length', 'unlock_hour']].copy()
-
-    # Normalize features
-    scaler = StandardScaler()
-    features_scaled = scaler.fit_transform(features)
-
-    # Isolation Forest
-    iso_forest = IsolationForest(contamination=contamination, random_state=42)
-    routes['anomaly'] = iso_forest.fit_predict(features_scaled)
-    routes['anomaly_score'] = iso_forest.score_samples(features_scaled)
-
-    # -1 for anomalies, 1 for normal
-    anomalies = routes[routes['anomaly'] == -1]
-    normal = routes[routes['anomaly'] == 1]
+    # Select features for anomaly detection, written column by column into
+    # one float32 matrix (no intermediate DataFrame)
+    feature_columns = ['duration_minutes_calculated', 'length', 'unlock_hour']
+    features = np.empty((len(routes), len(feature_columns)), dtype=np.float32)
+    for i, col in enumerate(feature_columns):
+        features[:, i] = routes[col].to_numpy()
+
+    # Normalize features (float32 is what the forest's trees work in, so
+    # fit and scoring do not make their own converted copy)
+    features_scaled = standardize_features(features)
+
+    # Isolation Forest scores, labelled with the same rule as predict():
+    # score below offset_ is an anomaly
+    scores, offset = _isolation_forest_scores(features_scaled, contamination)
+    routes['anomaly'] = np.where(scores < offset, -1, 1).astype(np.int8)
+    routes['anomaly_score'] = scores
+
+    # -1 for anomalies, 1 for normal; only the plotted/reported columns are copied
+    is_anomaly = routes['anomaly'].to_numpy() == -1
+    subset_columns = ['length', 'duration_minutes_calculated', 'unlock_hour', 'anomaly_score']
+    anomalies = routes.loc[is_anomaly, subset_columns]
+    normal = routes.loc[~is_anomaly, subset_columns]
 
     # Visualization
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-
-    # Duration vs Distance
-    axes[0, 0].scatter(normal['length'], normal['duration_minutes_calculated'],
-                      alpha=0.3, s=20, c='blue', label='Normal', edgecolors='none')
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10), layout='constrained')
+
+    # Duration vs Distance (normal trips subsampled; every anomaly is drawn)
+    idx = plotting.sample_indices(len(normal))
+    axes[0, 0].scatter(normal['length'].to_numpy()[idx],
+                      normal['duration_minutes_calculated'].to_numpy()[idx],
+                      alpha=0.3, s=20, c='blue', label='Normal', edgecolors='none',
+                      rasterized=True)
     axes[0, 0].scatter(anomalies['length'], anomalies['duration_minutes_calculated'],
                       alpha=0.8, s=50, c='red', label='Anomaly', marker='x')
     axes[0, 0].set_title('Anomaly Detection: Duration vs Distance', fontweight='bold')
@@ -230,9 +291,11 @@ def detect_anomalies(routes, contamination=0.05):
     axes[0, 0].legend()
     axes[0, 0].grid(alpha=0.3)
 
-    # Anomaly scores distribution
-    axes[0, 1].hist(routes['anomaly_score'], bins=50, edgecolor='black', alpha=0.7)
-    axes[0, 1].axvline(routes[routes['anomaly'] == -1]['anomaly_score'].max(),
+    # Anomaly scores distribution (binned from a seeded sample of the scores;
+    # the threshold is the forest's decision offset itself)
+    plotting.draw_histogram(axes[0, 1], scores[plotting.sample_indices(len(scores))],
+                            bins=50, edgecolor='black', alpha=0.7)
+    axes[0, 1].axvline(offset,
                       color='red', linestyle='--', linewidth=2, label='Anomaly Threshold')
     axes[0, 1].set_title('Anomaly Score Distribution', fontweight='bold')
     axes[0, 1].set_xlabel('Anomaly Score')
@@ -241,8 +304,8 @@ def detect_anomalies(routes, contamination=0.05):
     axes[0, 1].grid(alpha=0.3)
 
     # Anomalies by hour
-    anomaly_by_hour = routes.groupby('unlock_hour')['anomaly'].apply(lambda x: (x == -1).sum())
-    axes[1, 0].bar(anomaly_by_hour.index, anomaly_by_hour.values,
+    anomaly_by_hour = np.bincount(anomalies['unlock_hour'].to_numpy(dtype=np.intp), minlength=24)[:24]
+    axes[1, 0].bar(np.arange(24), anomaly_by_hour,
                   color='red', edgecolor='black', alpha=0.7)
     axes[1, 0].set_title('Anomalies by Hour', fontweight='bold')
     axes[1, 0].set_xlabel('Hour of Day')
@@ -261,7 +324,6 @@ def detect_anomalies(routes, contamination=0.05):
     axes[1, 1].set_xlabel('Average Value')
     axes[1, 1].grid(axis='x', alpha=0.3)
 
-    plt.tight_layout()
     filepath = plotting.save_figure(fig, 'anomaly_detection.png', 'ml')
 
     # Report
@@ -273,7 +335,7 @@ def detect_anomalies(routes, contamination=0.05):
     report_lines.append("**Anomaly Characteristics**:")
     report_lines.append(f"- Avg duration: {anomalies['duration_minutes_calculated'].mean():.1f} min (vs {normal['duration_minutes_calculated'].mean():.1f} normal)")
     report_lines.append(f"- Avg distance: {anomalies['length'].mean():.2f} km (vs {normal['length'].mean():.2f} normal)")
-    report_lines.append(f"- Most anomalies at hour: {anomaly_by_hour.idxmax()}:00")
+    report_lines.append(f"- Most anomalies at hour: {int(anomaly_by_hour.argmax())}:00")
 
     return routes, [filepath], report_lines
 
@@ -289,44 +351,65 @@ def cluster_routes_spatial(routes, n_clusters=5):
     Returns:
         tuple: (route_clusters, visualization_paths, report_lines)
     """
-    # Create OD pair features
-    od_pairs = routes.groupby(['startstationname', 'endstationname']).agg({
-        'route_code': 'count',
-        'duration_minutes_calculated': 'mean',
-        'length': 'mean'
-    }).reset_index()
-    od_pairs.columns = ['origin', 'destination', 'trip_count', 'avg_duration', 'avg_distance']
+    # Create OD pair features, grouped on one int64 OD code per trip
+    # instead of the (start, end) station key pair
+    od_codes, stations = get_od_codes(routes)
+    valid = od_codes >= 0
+    od_stats = aggregation.group_stats(
+        pd.DataFrame({
+            'od_code': od_codes[valid],
+            'avg_duration': routes['duration_minutes_calculated'].to_numpy()[valid],
+            'avg_distance': routes['length'].to_numpy()[valid]
+        }),
+        'od_code', ['avg_duration', 'avg_distance']
+    )
+    origin, destination = decode_od_codes(od_stats.index, stations)
+    od_pairs = pd.DataFrame({
+        'origin': origin,
+        'destination': destination,
+        'trip_count': od_stats['count'].to_numpy(),
+        'avg_duration': od_stats['avg_duration'].to_numpy(),
+        'avg_distance': od_stats['avg_distance'].to_numpy()
+    })
 
     # Filter to significant routes (at least 5 trips)
-    od_pairs = od_pairs[od_pairs['trip_count'] >= 5]
+    od_pairs = od_pairs[od_pairs['trip_count'] >= 5].reset_index(drop=True)
 
     # Prepare features for clustering
-    features = od_pairs[['trip_count', 'avg_duration', 'avg_distance']].copy()
-    scaler = StandardScaler()
-    features_scaled = scaler.fit_transform(features)
+    features_scaled = standardize_features(od_pairs[['trip_count', 'avg_duration', 'avg_distance']])
 
-    # K-means clustering
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    od_pairs['cluster'] = kmeans.fit_predict(features_scaled)
+    # K-means clustering (mini-batch updates instead of full Lloyd passes);
+    # labels stored as uint8 like the other small integer columns
+    od_pairs['cluster'] = _kmeans_labels(features_scaled, n_clusters).astype(np.uint8)
 
     # Visualization
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10), layout='constrained')
 
     # Cluster sizes
-    cluster_counts = od_pairs['cluster'].value_counts().sort_index()
+    cluster_counts = np.bincount(od_pairs['cluster'].to_numpy(), minlength=n_clusters)
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd'][:n_clusters]
-    axes[0, 0].bar(cluster_counts.index, cluster_counts.values,
+    axes[0, 0].bar(np.arange(n_clusters), cluster_counts,
                    color=colors, edgecolor='black')
     axes[0, 0].set_title('Route Cluster Sizes', fontweight='bold')
     axes[0, 0].set_xlabel('Cluster')
     axes[0, 0].set_ylabel('Number of OD Pairs')
     axes[0, 0].grid(axis='y', alpha=0.3)
 
+    # Row positions of each cluster and the plotted columns, shared by both scatters
+    cluster_rows = np.split(np.argsort(od_pairs['cluster'].to_numpy(), kind='stable'),
+                            np.cumsum(cluster_counts)[:-1])
+    # Large clusters are drawn from a sample, split evenly across clusters
+    cluster_rows = [rows[plotting.sample_indices(len(rows), config.MAX_SCATTER_POINTS // n_clusters)]
+                    for rows in cluster_rows]
+    trip_count = od_pairs['trip_count'].to_numpy()
+    avg_duration = od_pairs['avg_duration'].to_numpy()
+    avg_distance = od_pairs['avg_distance'].to_numpy()
+
     # Trip count vs Distance by cluster
-    for cluster in range(n_clusters):
-        cluster_data = od_pairs[od_pairs['cluster'] == cluster]
-        axes[0, 1].scatter(cluster_data['trip_count'], cluster_data['avg_distance'],
-                          label=f'Cluster {cluster}', alpha=0.6, s=50, color=colors[cluster])
+    for cluster, rows in enumerate(cluster_rows):
+        axes[0, 1].scatter(trip_count[rows], avg_distance[rows],
+                          label=f'Cluster {cluster}', alpha=0.6, s=50, color=colors[cluster],
+                          rasterized=True)
     axes[0, 1].set_title('Trip Count vs Distance by Cluster', fontweight='bold')
     axes[0, 1].set_xlabel('Number of Trips')
     axes[0, 1].set_ylabel('Average Distance (km)')
@@ -334,10 +417,10 @@ def cluster_routes_spatial(routes, n_clusters=5):
     axes[0, 1].grid(alpha=0.3)
 
     # Duration vs Distance by cluster
-    for cluster in range(n_clusters):
-        cluster_data = od_pairs[od_pairs['cluster'] == cluster]
-        axes[1, 0].scatter(cluster_data['avg_distance'], cluster_data['avg_duration'],
-                          label=f'Cluster {cluster}', alpha=0.6, s=50, color=colors[cluster])
+    for cluster, rows in enumerate(cluster_rows):
+        axes[1, 0].scatter(avg_distance[rows], avg_duration[rows],
+                          label=f'Cluster {cluster}', alpha=0.6, s=50, color=colors[cluster],
+                          rasterized=True)
     axes[1, 0].set_title('Distance vs Duration by Cluster', fontweight='bold')
     axes[1, 0].set_xlabel('Average Distance (km)')
     axes[1, 0].set_ylabel('Average Duration (minutes)')
@@ -345,11 +428,14 @@ def cluster_routes_spatial(routes, n_clusters=5):
     axes[1, 0].grid(alpha=0.3)
 
     # Top routes per cluster
-    top_routes = []
-    for cluster in range(min(3, n_clusters)):
-        cluster_routes = od_pairs[od_pairs['cluster'] == cluster].nlargest(3, 'trip_count')
-        top_routes.extend([f"C{cluster}: {row['origin'][:10]}→{row['destination'][:10]}"
-                          for _, row in cluster_routes.iterrows()])
+    # Three busiest routes of each of the first three clusters, selected
+    # per cluster with a partial sort (nlargest) rather than sorting every pair
+    top_rows = od_pairs[od_pairs['cluster'] < 3].groupby('cluster', sort=True)['trip_count'].nlargest(3)
+    ranked = od_pairs.loc[top_rows.index.get_level_values(-1)]
+    top_routes = [f"C{cluster}: {origin[:10]}→{destination[:10]}"
+                  for cluster, origin, destination in zip(ranked['cluster'],
+                                                          ranked['origin'].astype(str),
+                                                          ranked['destination'].astype(str))]
 
     axes[1, 1].axis('off')
     axes[1, 1].text(0.1, 0.9, 'Top Routes by Cluster', fontsize=12, fontweight='bold',
@@ -358,7 +444,6 @@ def cluster_routes_spatial(routes, n_clusters=5):
         axes[1, 1].text(0.1, 0.8 - i*0.08, route, fontsize=9,
                        transform=axes[1, 1].transAxes)
 
-    plt.tight_layout()
     filepath = plotting.save_figure(fig, 'route_clustering.png', 'ml')
 
     # Report
@@ -367,12 +452,17 @@ def cluster_routes_spatial(routes, n_clusters=5):
     report_lines.append(f"**Total OD Pairs Analyzed**: {len(od_pairs)}")
     report_lines.append("")
 
-    for cluster in range(n_clusters):
-        cluster_data = od_pairs[od_pairs['cluster'] == cluster]
-        report_lines.append(f"**Cluster {cluster}**:")
-        report_lines.append(f"- Routes: {len(cluster_data)}")
-        report_lines.append(f"- Avg trips/route: {cluster_data['trip_count'].mean():.1f}")
-        report_lines.append(f"- Avg distance: {cluster_data['avg_distance'].mean():.2f} km")
+    # Per-cluster sizes and means in one pass instead of a mask per cluster
+    cluster_summary = od_pairs.groupby('cluster').agg(
+        routes=('trip_count', 'size'),
+        trip_count=('trip_count', 'mean'),
+        avg_distance=('avg_distance', 'mean')
+    )
+    for row in cluster_summary.itertuples():
+        report_lines.append(f"**Cluster {row.Index}**:")
+        report_lines.append(f"- Routes: {row.routes}")
+        report_lines.append(f"- Avg trips/route: {row.trip_count:.1f}")
+        report_lines.append(f"- Avg distance: {row.avg_distance:.2f} km")
         report_lines.append("")
 
     return od_pairs, [filepath], report_lines
@@ -394,15 +484,22 @@ def run_ml_analysis(routes, report):
 
     results = {}
 
+    report.add_section("Machine Learning Analysis")
+
+    # Nothing to fit or draw without trips
+    if routes.empty:
+        print("  ⚠ No trips to analyze, skipping machine learning analysis")
+        report.add_line("No trips available; machine learning analysis skipped.")
+        report.add_line("")
+        return results
+
     # Demand prediction
     print("  • Predicting hourly demand...")
     predictions, viz_files, report_lines = predict_hourly_demand(routes)
     results['demand_prediction'] = {'predictions': predictions, 'visualizations': viz_files}
 
-    report.add_section("Machine Learning Analysis")
     report.add_subsection("Demand Prediction")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
     # User clustering
@@ -411,8 +508,7 @@ def run_ml_analysis(routes, report):
     results['user_clustering'] = {'clusters': user_clusters, 'visualizations': viz_files}
 
     report.add_subsection("User Behavior Clustering")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     # Route clustering
     print("  • Clustering routes...")
@@ -420,8 +516,7 @@ def run_ml_analysis(routes, report):
     results['route_clustering'] = {'clusters': route_clusters, 'visualizations': viz_files}
 
     report.add_subsection("Route Clustering")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     # Anomaly detection
     print("  • Detecting anomalies...")
@@ -429,8 +524,7 @@ def run_ml_analysis(routes, report):
     results['anomaly_detection'] = {'data': routes_with_anomalies, 'visualizations': viz_files}
 
     report.add_subsection("Anomaly Detection")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
 
     print(f"  ✓ Machine learning analysis complete")
 
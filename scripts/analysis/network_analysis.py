@@ -13,7 +13,14 @@ import matplotlib.cm as cm
 from matplotlib.colors import Normalize
 import os
 from . import config
-from .utils import plotting
+from .data_loader import get_od_codes, decode_od_codes
+from .utils import aggregation, plotting
+
+try:
+    import networkit as nk
+    NETWORKIT_AVAILABLE = True
+except ImportError:
+    NETWORKIT_AVAILABLE = False
 
 
 def create_station_network(routes):
@@ -26,44 +33,120 @@ def create_station_network(routes):
     Returns:
         tuple: (NetworkX DiGraph, network_stats dict)
     """
-    # Create directed graph
-    G = nx.DiGraph()
-
-    # Add edges with weights (trip counts)
-    route_counts = routes.groupby(['startstationname', 'endstationname']).agg({
-        'route_code': 'count',
-        'duration_minutes_calculated': 'mean',
-        'length': 'mean'
-    }).reset_index()
-    route_counts.columns = ['source', 'target', 'weight', 'avg_duration', 'avg_distance']
-
-    # Add edges
-    for _, row in route_counts.iterrows():
-        if row['source'] != row['target']:  # Skip self-loops
-            G.add_edge(
-                row['source'],
-                row['target'],
-                weight=row['weight'],
-                duration=row['avg_duration'],
-                distance=row['avg_distance']
-            )
+    # Edge weights (trip counts) and mean duration/distance per station pair,
+    # grouped on one integer OD code per trip over the shared station categories
+    od_codes, stations = get_od_codes(routes)
+    valid = od_codes >= 0
+    od_stats = aggregation.group_stats(
+        pd.DataFrame({
+            'od_code': od_codes[valid],
+            'duration': routes['duration_minutes_calculated'].to_numpy()[valid],
+            'distance': routes['length'].to_numpy()[valid]
+        }),
+        'od_code', ['duration', 'distance']
+    )
+    source, target = decode_od_codes(od_stats.index, stations)
+    route_counts = pd.DataFrame({
+        'source': source,
+        'target': target,
+        'weight': od_stats['count'].to_numpy(),
+        'duration': od_stats['duration'].to_numpy(),
+        'distance': od_stats['distance'].to_numpy()
+    })
+
+    # Create directed graph from the edge table in one call (self-loops skipped)
+    G = nx.from_pandas_edgelist(
+        route_counts[route_counts['source'] != route_counts['target']],
+        source='source',
+        target='target',
+        edge_attr=['weight', 'duration', 'distance'],
+        create_using=nx.DiGraph
+    )
 
     # Network statistics
+    is_weakly_connected = nx.is_weakly_connected(G)
     network_stats = {
         'nodes': G.number_of_nodes(),
         'edges': G.number_of_edges(),
         'density': nx.density(G),
         'is_strongly_connected': nx.is_strongly_connected(G),
-        'is_weakly_connected': nx.is_weakly_connected(G)
+        'is_weakly_connected': is_weakly_connected
     }
 
-    if nx.is_weakly_connected(G):
-        network_stats['diameter'] = nx.diameter(G.to_undirected())
-        network_stats['avg_shortest_path'] = nx.average_shortest_path_length(G.to_undirected())
+    if is_weakly_connected:
+        # One undirected view (no edge copy) shared by both path statistics
+        G_undirected = G.to_undirected(as_view=True)
+        network_stats['diameter'] = nx.diameter(G_undirected)
+        network_stats['avg_shortest_path'] = nx.average_shortest_path_length(G_undirected)
 
     return G, network_stats
 
 
+def to_networkit(G, reverse=False):
+    """
+    Copy a NetworkX graph into a weighted NetworKit graph.
+
+    Args:
+        G (nx.Graph or nx.DiGraph): Network graph
+        reverse (bool): Flip the direction of every edge
+
+    Returns:
+        tuple: (nodes in NetworKit index order, networkit.Graph)
+    """
+    nodes = list(G.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    graph = nk.Graph(len(nodes), weighted=True, directed=G.is_directed())
+    for source, target, weight in G.edges(data='weight'):
+        if reverse:
+            source, target = target, source
+        graph.addEdge(node_index[source], node_index[target], weight)
+    return nodes, graph
+
+
+def centrality_scores(G):
+    """
+    Weighted betweenness, closeness, PageRank and eigenvector centrality.
+
+    Uses NetworKit's parallel C++ implementations when installed, otherwise
+    NetworkX; both give the same values. Closeness measures distances
+    into each station, so NetworKit runs it on the reversed graph.
+
+    Args:
+        G (nx.DiGraph): Network graph
+
+    Returns:
+        dict: Score per node for each metric
+    """
+    if not NETWORKIT_AVAILABLE:
+        # Eigenvector centrality is solved on the sparse adjacency matrix
+        # with ARPACK and may fail to converge
+        try:
+            eigenvector = nx.eigenvector_centrality_numpy(G, weight='weight', max_iter=1000)
+        except:
+            eigenvector = {node: 0 for node in G.nodes()}
+
+        return {
+            'betweenness_centrality': nx.betweenness_centrality(G, weight='weight'),
+            'closeness_centrality': nx.closeness_centrality(G, distance='weight'),
+            'pagerank': nx.pagerank(G, weight='weight'),
+            'eigenvector_centrality': eigenvector
+        }
+
+    nodes, graph = to_networkit(G)
+    _, reversed_graph = to_networkit(G, reverse=True)
+
+    algorithms = {
+        'betweenness_centrality': nk.centrality.Betweenness(graph, normalized=True),
+        'closeness_centrality': nk.centrality.Closeness(
+            reversed_graph, True, nk.centrality.ClosenessVariant.Generalized),
+        'pagerank': nk.centrality.PageRank(
+            graph, damp=0.85, distributeSinks=nk.centrality.SinkHandling.DistributeSinks),
+        'eigenvector_centrality': nk.centrality.EigenvectorCentrality(graph)
+    }
+    return {metric: dict(zip(nodes, algorithm.run().scores()))
+            for metric, algorithm in algorithms.items()}
+
+
 def calculate_centrality_metrics(G):
     """
     Calculate various centrality metrics for the network.
@@ -79,32 +162,21 @@ def calculate_centrality_metrics(G):
     out_degree = dict(G.out_degree())
     degree_centrality = nx.degree_centrality(G)
 
-    # Betweenness centrality
-    betweenness = nx.betweenness_centrality(G, weight='weight')
-
-    # Closeness centrality
-    closeness = nx.closeness_centrality(G, distance='weight')
-
-    # PageRank
-    pagerank = nx.pagerank(G, weight='weight')
-
-    # Eigenvector centrality (if possible)
-    try:
-        eigenvector = nx.eigenvector_centrality(G, weight='weight', max_iter=1000)
-    except:
-        eigenvector = {node: 0 for node in G.nodes()}
-
-    # Combine into dataframe
-    centrality_df = pd.DataFrame({
-        'station': list(G.nodes()),
-        'in_degree': [in_degree[n] for n in G.nodes()],
-        'out_degree': [out_degree[n] for n in G.nodes()],
-        'degree_centrality': [degree_centrality[n] for n in G.nodes()],
-        'betweenness_centrality': [betweenness[n] for n in G.nodes()],
-        'closeness_centrality': [closeness[n] for n in G.nodes()],
-        'pagerank': [pagerank[n] for n in G.nodes()],
-        'eigenvector_centrality': [eigenvector[n] for n in G.nodes()]
-    })
+    # Betweenness, closeness, PageRank and eigenvector centrality
+    scores = centrality_scores(G)
+    betweenness = scores['betweenness_centrality']
+    closeness = scores['closeness_centrality']
+    pagerank = scores['pagerank']
+    eigenvector = scores['eigenvector_centrality']
+
+    # Combine into dataframe (one pass over the nodes, one row tuple each)
+    centrality_df = pd.DataFrame(
+        [(n, in_degree[n], out_degree[n], degree_centrality[n], betweenness[n],
+          closeness[n], pagerank[n], eigenvector[n]) for n in G.nodes()],
+        columns=['station', 'in_degree', 'out_degree', 'degree_centrality',
+                 'betweenness_centrality', 'closeness_centrality', 'pagerank',
+                 'eigenvector_centrality']
+    )
 
     # Sort by PageRank
     centrality_df = centrality_df.sort_values('pagerank', ascending=False).reset_index(drop=True)
@@ -112,6 +184,31 @@ def calculate_centrality_metrics(G):
     return centrality_df
 
 
+def louvain_communities(G_undirected):
+    """
+    Weighted Louvain communities of an undirected graph.
+
+    Uses NetworKit's parallel C++ PLM implementation when installed,
+    otherwise NetworkX's Louvain with a fixed seed.
+
+    Args:
+        G_undirected (nx.Graph): Undirected network graph
+
+    Returns:
+        list: One set of nodes per community
+    """
+    if not NETWORKIT_AVAILABLE:
+        return nx.community.louvain_communities(G_undirected, weight='weight', seed=42)
+
+    nodes, graph = to_networkit(G_undirected)
+    nk.setSeed(42, False)
+    partition = nk.community.PLM(graph).run().getPartition()
+    communities = {}
+    for node, label in zip(nodes, partition.getVector()):
+        communities.setdefault(label, set()).add(node)
+    return list(communities.values())
+
+
 def detect_communities(G):
     """
     Detect communities in the station network.
@@ -125,10 +222,10 @@ def detect_communities(G):
     # Convert to undirected for community detection
     G_undirected = G.to_undirected()
 
-    # Use Louvain method (greedy modularity)
+    # Use Louvain method
     try:
         from networkx.algorithms import community
-        communities = community.greedy_modularity_communities(G_undirected, weight='weight')
+        communities = louvain_communities(G_undirected)
 
         # Convert to dict
         community_dict = {}
@@ -167,24 +264,24 @@ def analyze_shortest_paths(G, top_stations):
 
     paths_data = []
 
-    # Calculate paths between top stations
+    # Calculate paths between top stations: one Dijkstra run per source
+    # gives the distances and paths to every target
     for i, source in enumerate(top_stations[:10]):
+        if source not in G_undirected:
+            continue
+        distances, paths = nx.single_source_dijkstra(G_undirected, source, weight='weight')
+
         for target in top_stations[i+1:11]:
-            if source != target and source in G_undirected and target in G_undirected:
-                try:
-                    # Shortest path
-                    path = nx.shortest_path(G_undirected, source, target, weight='weight')
-                    path_length = nx.shortest_path_length(G_undirected, source, target, weight='weight')
-
-                    paths_data.append({
-                        'source': source,
-                        'target': target,
-                        'path_length': len(path) - 1,  # Number of hops
-                        'weighted_distance': path_length,
-                        'path': ' → '.join(path[:3]) + ('...' if len(path) > 3 else '')
-                    })
-                except nx.NetworkXNoPath:
-                    continue
+            # Unreachable targets have no entry
+            if source != target and target in distances:
+                path = paths[target]
+                paths_data.append({
+                    'source': source,
+                    'target': target,
+                    'path_length': len(path) - 1,  # Number of hops
+                    'weighted_distance': distances[target],
+                    'path': ' → '.join(path[:3]) + ('...' if len(path) > 3 else '')
+                })
 
     paths_df = pd.DataFrame(paths_data)
     if len(paths_df) > 0:
@@ -218,9 +315,9 @@ def visualize_network(G, centrality_df, community_dict, top_n=30):
     # Layout
     pos = nx.spring_layout(G_sub, k=2, iterations=50, seed=42)
 
-    # Node sizes by PageRank
-    node_sizes = [centrality_df[centrality_df['station'] == n]['pagerank'].values[0] * 10000
-                  for n in G_sub.nodes()]
+    # Node sizes by PageRank (one station -> score map instead of a scan per node)
+    pagerank = dict(zip(centrality_df['station'], centrality_df['pagerank']))
+    node_sizes = [pagerank[n] * 10000 for n in G_sub.nodes()]
 
     # Node colors by community
     node_colors = [community_dict.get(n, 0) for n in G_sub.nodes()]
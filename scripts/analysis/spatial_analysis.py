@@ -5,25 +5,25 @@ Spatial Analysis
 Location-based analysis functions.
 """
 
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 from . import config
-from .utils import plotting
+from .data_loader import get_od_codes, decode_od_codes
+from .utils import aggregation, plotting
 
 
-def analyze_popular_stations(routes):
+def plot_top_stations(top_start, top_end):
     """
-    Analyze most popular stations.
+    Plot the busiest start and end stations side by side.
 
     Args:
-        routes (pd.DataFrame): Routes dataframe
+        top_start (pd.Series): Trip counts of the top start stations
+        top_end (pd.Series): Trip counts of the top end stations
 
     Returns:
-        tuple: (top_start, top_end, visualizations, report_lines)
+        matplotlib.figure.Figure: The created figure
     """
-    top_start = routes['startstationname'].value_counts().head(10)
-    top_end = routes['endstationname'].value_counts().head(10)
-
-    # Create visualization
     fig, axes = plt.subplots(1, 2, figsize=(16, 6))
 
     top_start.plot(kind='barh', ax=axes[0], color=config.COLORS['primary'], edgecolor='black')
@@ -39,7 +39,26 @@ def analyze_popular_stations(routes):
     axes[1].grid(axis='x', alpha=0.3)
 
     plt.tight_layout()
-    filepath = plotting.save_figure(fig, 'top_stations.png', 'statistical')
+    return fig
+
+
+def analyze_popular_stations(routes, executor=None):
+    """
+    Analyze most popular stations.
+
+    Args:
+        routes (pd.DataFrame): Routes dataframe
+        executor (concurrent.futures.Executor): Optional figure render pool
+
+    Returns:
+        tuple: (top_start, top_end, visualizations, report_lines)
+    """
+    top_start = aggregation.top_categories(routes['startstationname'])
+    top_end = aggregation.top_categories(routes['endstationname'])
+
+    # Create visualization
+    filepath = plotting.render_figure(plot_top_stations, 'top_stations.png', 'statistical',
+                                      top_start, top_end, executor=executor)
 
     # Report
     report_lines = []
@@ -64,40 +83,54 @@ def analyze_trip_types(routes):
     Returns:
         tuple: (round_trip_pct, report_lines)
     """
-    routes_copy = routes.copy()
-    routes_copy['is_round_trip'] = routes_copy['startstationname'] == routes_copy['endstationname']
-    round_trip_pct = (routes_copy['is_round_trip'].sum() / len(routes_copy)) * 100
+    # Compare the shared station category codes directly (no frame copy);
+    # a missing station (-1) never counts as a round trip
+    start_codes = routes['startstationname'].cat.codes.to_numpy()
+    end_codes = routes['endstationname'].cat.codes.to_numpy()
+    round_trips = int(np.count_nonzero((start_codes == end_codes) & (start_codes >= 0)))
+    round_trip_pct = (round_trips / len(routes)) * 100
 
     report_lines = []
-    report_lines.append(f"- **Round trips**: {routes_copy['is_round_trip'].sum():,} ({round_trip_pct:.1f}%)")
-    report_lines.append(f"- **One-way trips**: {(~routes_copy['is_round_trip']).sum():,} ({100-round_trip_pct:.1f}%)")
+    report_lines.append(f"- **Round trips**: {round_trips:,} ({round_trip_pct:.1f}%)")
+    report_lines.append(f"- **One-way trips**: {len(routes) - round_trips:,} ({100-round_trip_pct:.1f}%)")
 
     return round_trip_pct, report_lines
 
 
-def analyze_popular_routes(routes):
+def analyze_popular_routes(routes, executor=None):
     """
     Analyze most popular routes (OD pairs).
 
     Args:
         routes (pd.DataFrame): Routes dataframe
+        executor (concurrent.futures.Executor): Optional figure render pool
 
     Returns:
         tuple: (top_routes, visualizations, report_lines)
     """
-    routes_copy = routes.copy()
-    routes_copy['is_round_trip'] = routes_copy['startstationname'] == routes_copy['endstationname']
-    routes_copy['od_pair'] = routes_copy['startstationname'] + ' → ' + routes_copy['endstationname']
+    # Count one-way OD pairs on integer codes, label only the top 10
+    od_codes, stations = get_od_codes(routes)
+    is_one_way = (routes['startstationname'] != routes['endstationname']).to_numpy()
+    top_codes, top_counts = aggregation.top_counts(
+        np.where(is_one_way, od_codes, -1), 10, minlength=len(stations) ** 2
+    )
+    top_codes, top_counts = top_codes[top_counts > 0], top_counts[top_counts > 0]
 
-    top_routes = routes_copy[~routes_copy['is_round_trip']]['od_pair'].value_counts().head(10)
+    origin, destination = decode_od_codes(top_codes, stations)
+    top_routes = pd.Series(
+        top_counts,
+        index=pd.Index([f"{o} → {d}" for o, d in zip(origin, destination)], name='od_pair'),
+        name='count'
+    )
 
     # Create visualization
-    fig = plotting.create_horizontal_bar_chart(
+    filepath = plotting.render_figure(
+        plotting.create_horizontal_bar_chart, 'top_routes.png', 'statistical',
         top_routes,
         'Top 10 Most Popular Routes (One-Way)',
-        'Number of Trips'
+        'Number of Trips',
+        executor=executor
     )
-    filepath = plotting.save_figure(fig, 'top_routes.png', 'statistical')
 
     # Report
     report_lines = []
@@ -107,13 +140,14 @@ def analyze_popular_routes(routes):
     return top_routes, [filepath], report_lines
 
 
-def run_spatial_analysis(routes, report):
+def run_spatial_analysis(routes, report, executor=None):
     """
     Run all spatial analyses.
 
     Args:
         routes (pd.DataFrame): Routes dataframe
         report (MarkdownReport): Report object
+        executor (concurrent.futures.Executor): Optional figure render pool
 
     Returns:
         dict: Analysis results
@@ -125,7 +159,7 @@ def run_spatial_analysis(routes, report):
 
     # Popular stations
     print("  • Analyzing popular stations...")
-    top_start, top_end, viz_files, report_lines = analyze_popular_stations(routes)
+    top_start, top_end, viz_files, report_lines = analyze_popular_stations(routes, executor)
     results['stations'] = {
         'top_start': top_start,
         'top_end': top_end,
@@ -134,8 +168,7 @@ def run_spatial_analysis(routes, report):
 
     report.add_section("Spatial Analysis")
     report.add_subsection("Most Popular Stations")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
     # Trip types
@@ -144,20 +177,21 @@ def run_spatial_analysis(routes, report):
     results['trip_types'] = {'round_trip_pct': round_trip_pct}
 
     report.add_subsection("Trip Types")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
     # Popular routes
     print("  • Analyzing popular routes...")
-    top_routes, viz_files, report_lines = analyze_popular_routes(routes)
+    top_routes, viz_files, report_lines = analyze_popular_routes(routes, executor)
     results['routes'] = {'top_routes': top_routes, 'visualizations': viz_files}
 
     report.add_subsection("Most Popular Routes")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
+    # Wait for the figures queued on the render pool
+    plotting.resolve_figures(results)
+
     print(f"  ✓ Spatial analysis complete")
 
     return results
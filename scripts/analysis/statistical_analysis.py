@@ -122,16 +122,17 @@ def test_time_period_differences(routes):
     Returns:
         dict: ANOVA results
     """
-    time_periods = routes['time_period'].unique()
-    period_groups = [routes[routes['time_period'] == period]['duration_minutes_calculated']
-                     for period in time_periods]
+    # Split both columns by the categorical codes in one grouping pass
+    # instead of a string comparison mask per period and column
+    grouped = routes.groupby('time_period', observed=True)
+    time_periods = list(grouped.groups)
+    period_groups = [values.to_numpy() for _, values in grouped['duration_minutes_calculated']]
+    distance_groups = [values.to_numpy() for _, values in grouped['length']]
 
     # ANOVA for duration
     duration_anova = stats.f_oneway(*period_groups)
 
     # ANOVA for distance
-    distance_groups = [routes[routes['time_period'] == period]['length']
-                       for period in time_periods]
     distance_anova = stats.f_oneway(*distance_groups)
 
     results = {
@@ -178,8 +179,9 @@ def analyze_user_segments(routes):
         labels=['Occasional', 'Regular', 'Heavy']
     )
 
-    # Segment statistics
-    segment_summary = user_stats.groupby('segment').agg({
+    # Segment statistics (one grouper reused by the summary and the plots)
+    segments = user_stats.groupby('segment', observed=True)
+    segment_summary = segments.agg({
         'trip_count': ['count', 'mean'],
         'avg_duration': 'mean',
         'avg_distance': 'mean',
@@ -199,7 +201,7 @@ def analyze_user_segments(routes):
     axes[0, 0].grid(axis='y', alpha=0.3)
 
     # Average trips per segment
-    segment_trips = user_stats.groupby('segment')['trip_count'].mean()
+    segment_trips = segments['trip_count'].mean()
     segment_trips.plot(
         kind='bar', ax=axes[0, 1], color=config.COLORS['secondary'], edgecolor='black'
     )
@@ -209,7 +211,7 @@ def analyze_user_segments(routes):
     axes[0, 1].grid(axis='y', alpha=0.3)
 
     # Box plot: Duration by segment
-    user_stats.boxplot(column='avg_duration', by='segment', ax=axes[1, 0])
+    plotting.draw_grouped_boxplot(axes[1, 0], segments['avg_duration'])
     axes[1, 0].set_title('Trip Duration by User Segment', fontweight='bold')
     axes[1, 0].set_ylabel('Average Duration (minutes)')
     axes[1, 0].set_xlabel('Segment')
@@ -217,7 +219,7 @@ def analyze_user_segments(routes):
     plt.xticks(rotation=0)
 
     # Box plot: Distance by segment
-    user_stats.boxplot(column='avg_distance', by='segment', ax=axes[1, 1])
+    plotting.draw_grouped_boxplot(axes[1, 1], segments['avg_distance'])
     axes[1, 1].set_title('Trip Distance by User Segment', fontweight='bold')
     axes[1, 1].set_ylabel('Average Distance (km)')
     axes[1, 1].set_xlabel('Segment')
@@ -249,6 +251,9 @@ def create_distribution_comparison(routes):
     Returns:
         list: Visualization file paths
     """
+    # 95th percentiles for the y-limits, one pass over both columns
+    upper = routes[['duration_minutes_calculated', 'length']].quantile(0.95)
+
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
     # Duration by time period
@@ -257,7 +262,7 @@ def create_distribution_comparison(routes):
     axes[0, 0].set_title('Trip Duration Distribution by Time Period', fontweight='bold', fontsize=12)
     axes[0, 0].set_ylabel('Duration (minutes)')
     axes[0, 0].set_xlabel('Time Period')
-    axes[0, 0].set_ylim(0, routes['duration_minutes_calculated'].quantile(0.95))
+    axes[0, 0].set_ylim(0, upper['duration_minutes_calculated'])
 
     # Distance by time period
     sns.violinplot(data=routes, x='time_period', y='length',
@@ -265,7 +270,7 @@ def create_distribution_comparison(routes):
     axes[0, 1].set_title('Trip Distance Distribution by Time Period', fontweight='bold', fontsize=12)
     axes[0, 1].set_ylabel('Distance (km)')
     axes[0, 1].set_xlabel('Time Period')
-    axes[0, 1].set_ylim(0, routes['length'].quantile(0.95))
+    axes[0, 1].set_ylim(0, upper['length'])
 
     # Duration by bike type
     sns.violinplot(data=routes, x='CycleType', y='duration_minutes_calculated',
@@ -273,7 +278,7 @@ def create_distribution_comparison(routes):
     axes[1, 0].set_title('Trip Duration Distribution by Bike Type', fontweight='bold', fontsize=12)
     axes[1, 0].set_ylabel('Duration (minutes)')
     axes[1, 0].set_xlabel('Bike Type')
-    axes[1, 0].set_ylim(0, routes['duration_minutes_calculated'].quantile(0.95))
+    axes[1, 0].set_ylim(0, upper['duration_minutes_calculated'])
 
     # Distance by bike type
     sns.violinplot(data=routes, x='CycleType', y='length',
@@ -281,7 +286,7 @@ def create_distribution_comparison(routes):
     axes[1, 1].set_title('Trip Distance Distribution by Bike Type', fontweight='bold', fontsize=12)
     axes[1, 1].set_ylabel('Distance (km)')
     axes[1, 1].set_xlabel('Bike Type')
-    axes[1, 1].set_ylim(0, routes['length'].quantile(0.95))
+    axes[1, 1].set_ylim(0, upper['length'])
 
     plt.tight_layout()
     filepath = plotting.save_figure(fig, 'distribution_comparisons.png', 'statistical')
@@ -379,8 +384,7 @@ def run_statistical_analysis(routes, report):
     results['user_segments'] = {'data': segments, 'visualizations': viz_files}
 
     report.add_subsection("User Segmentation Analysis")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
     # Distribution comparisons
@@ -7,22 +7,19 @@ Time-based analysis functions.
 
 import matplotlib.pyplot as plt
 from . import config
-from .utils import plotting, reporting
+from .utils import aggregation, plotting, reporting
 
 
-def analyze_hourly_patterns(routes):
+def plot_hourly_pattern(hourly_trips):
     """
-    Analyze hourly usage patterns.
+    Plot trips per hour as bar and line charts.
 
     Args:
-        routes (pd.DataFrame): Routes dataframe
+        hourly_trips (pd.Series): Trip counts indexed by hour
 
     Returns:
-        tuple: (hourly_data, peak_hour, visualizations, report_lines)
+        matplotlib.figure.Figure: The created figure
     """
-    hourly_trips = routes.groupby('unlock_hour').size()
-
-    # Create visualizations
     fig, axes = plt.subplots(1, 2, figsize=(14, 6))
 
     # Bar chart
@@ -42,7 +39,25 @@ def analyze_hourly_patterns(routes):
     axes[1].grid(True, alpha=0.3)
 
     plt.tight_layout()
-    filepath = plotting.save_figure(fig, 'hourly_pattern.png', 'time_series')
+    return fig
+
+
+def analyze_hourly_patterns(routes, executor=None):
+    """
+    Analyze hourly usage patterns.
+
+    Args:
+        routes (pd.DataFrame): Routes dataframe
+        executor (concurrent.futures.Executor): Optional figure render pool
+
+    Returns:
+        tuple: (hourly_data, peak_hour, visualizations, report_lines)
+    """
+    hourly_trips = routes.groupby('unlock_hour').size()
+
+    # Create visualizations
+    filepath = plotting.render_figure(plot_hourly_pattern, 'hourly_pattern.png', 'time_series',
+                                      hourly_trips, executor=executor)
 
     # Statistics
     peak_hour = hourly_trips.idxmax()
@@ -59,20 +74,16 @@ def analyze_hourly_patterns(routes):
     return hourly_trips, peak_hour, [filepath], report_lines
 
 
-def analyze_daily_patterns(routes):
+def plot_daily_pattern(daily_trips):
     """
-    Analyze day-of-week patterns.
+    Plot trips per day of week.
 
     Args:
-        routes (pd.DataFrame): Routes dataframe
+        daily_trips (pd.Series): Trip counts indexed by day name
 
     Returns:
-        tuple: (daily_data, visualizations, report_lines)
+        matplotlib.figure.Figure: The created figure
     """
-    daily_trips = routes.groupby('unlock_dayofweek').size()
-    daily_trips.index = [config.DAY_NAMES[i] for i in daily_trips.index]
-
-    # Create visualization
     fig = plotting.create_bar_chart(
         daily_trips,
         'Trips by Day of Week',
@@ -81,7 +92,26 @@ def analyze_daily_patterns(routes):
         color=config.COLORS['secondary']
     )
     plt.xticks(rotation=45)
-    filepath = plotting.save_figure(fig, 'daily_pattern.png', 'time_series')
+    return fig
+
+
+def analyze_daily_patterns(routes, executor=None):
+    """
+    Analyze day-of-week patterns.
+
+    Args:
+        routes (pd.DataFrame): Routes dataframe
+        executor (concurrent.futures.Executor): Optional figure render pool
+
+    Returns:
+        tuple: (daily_data, visualizations, report_lines)
+    """
+    daily_trips = routes.groupby('unlock_dayofweek').size()
+    daily_trips.index = [config.DAY_NAMES[i] for i in daily_trips.index]
+
+    # Create visualization
+    filepath = plotting.render_figure(plot_daily_pattern, 'daily_pattern.png', 'time_series',
+                                      daily_trips, executor=executor)
 
     # Report
     report_lines = []
@@ -91,21 +121,24 @@ def analyze_daily_patterns(routes):
     return daily_trips, [filepath], report_lines
 
 
-def analyze_weekend_comparison(routes):
+def plot_weekend_comparison(weekend_stats):
     """
-    Compare weekday vs weekend patterns.
+    Plot weekday vs weekend trip counts, durations and distances.
 
     Args:
-        routes (pd.DataFrame): Routes dataframe
+        weekend_stats (pd.DataFrame): aggregation.group_stats output keyed by is_weekend
 
     Returns:
-        tuple: (visualizations, report_lines)
+        matplotlib.figure.Figure: The created figure
     """
+    weekend_counts = weekend_stats['count']
+    weekend_duration = weekend_stats['duration_minutes_calculated']
+    weekend_distance = weekend_stats['length']
+    labels = ['Weekday' if idx == 0 else 'Weekend' for idx in weekend_stats.index]
+
     fig, axes = plt.subplots(1, 3, figsize=(16, 5))
 
     # Trip count
-    weekend_counts = routes.groupby('is_weekend').size()
-    labels = ['Weekday' if idx == 0 else 'Weekend' for idx in weekend_counts.index]
     axes[0].bar(labels, weekend_counts.values,
                 color=[config.COLORS['weekday'], config.COLORS['weekend']],
                 edgecolor='black')
@@ -114,9 +147,7 @@ def analyze_weekend_comparison(routes):
     axes[0].grid(axis='y', alpha=0.3)
 
     # Duration
-    weekend_duration = routes.groupby('is_weekend')['duration_minutes_calculated'].mean()
-    duration_labels = ['Weekday' if idx == 0 else 'Weekend' for idx in weekend_duration.index]
-    axes[1].bar(duration_labels, weekend_duration.values,
+    axes[1].bar(labels, weekend_duration.values,
                 color=[config.COLORS['weekday'], config.COLORS['weekend']],
                 edgecolor='black')
     axes[1].set_title('Avg Duration: Weekday vs Weekend', fontweight='bold')
@@ -124,9 +155,7 @@ def analyze_weekend_comparison(routes):
     axes[1].grid(axis='y', alpha=0.3)
 
     # Distance
-    weekend_distance = routes.groupby('is_weekend')['length'].mean()
-    distance_labels = ['Weekday' if idx == 0 else 'Weekend' for idx in weekend_distance.index]
-    axes[2].bar(distance_labels, weekend_distance.values,
+    axes[2].bar(labels, weekend_distance.values,
                 color=[config.COLORS['weekday'], config.COLORS['weekend']],
                 edgecolor='black')
     axes[2].set_title('Avg Distance: Weekday vs Weekend', fontweight='bold')
@@ -134,7 +163,27 @@ def analyze_weekend_comparison(routes):
     axes[2].grid(axis='y', alpha=0.3)
 
     plt.tight_layout()
-    filepath = plotting.save_figure(fig, 'weekend_comparison.png', 'time_series')
+    return fig
+
+
+def analyze_weekend_comparison(routes, executor=None):
+    """
+    Compare weekday vs weekend patterns.
+
+    Args:
+        routes (pd.DataFrame): Routes dataframe
+        executor (concurrent.futures.Executor): Optional figure render pool
+
+    Returns:
+        tuple: (visualizations, report_lines)
+    """
+    # One aggregation pass for trip counts, durations and distances
+    weekend_stats = aggregation.group_stats(routes, 'is_weekend', ['duration_minutes_calculated', 'length'])
+    weekend_counts = weekend_stats['count']
+    weekend_duration = weekend_stats['duration_minutes_calculated']
+
+    filepath = plotting.render_figure(plot_weekend_comparison, 'weekend_comparison.png', 'time_series',
+                                      weekend_stats, executor=executor)
 
     # Report
     weekday_count = weekend_counts.iloc[0] if 0 in weekend_counts.index else 0
@@ -161,11 +210,9 @@ def analyze_time_periods(routes):
     Returns:
         tuple: (period_stats, report_lines)
     """
-    period_stats = routes.groupby('time_period').agg({
-        'route_code': 'count',
-        'duration_minutes_calculated': 'mean',
-        'length': 'mean'
-    }).round(2)
+    period_stats = aggregation.group_stats(
+        routes, 'time_period', ['duration_minutes_calculated', 'length']
+    ).round(2)
     period_stats.columns = ['Trip Count', 'Avg Duration (min)', 'Avg Distance (km)']
 
     report_lines = []
@@ -176,13 +223,14 @@ def analyze_time_periods(routes):
     return period_stats, report_lines
 
 
-def run_temporal_analysis(routes, report):
+def run_temporal_analysis(routes, report, executor=None):
     """
     Run all temporal analyses.
 
     Args:
         routes (pd.DataFrame): Routes dataframe
         report (MarkdownReport): Report object
+        executor (concurrent.futures.Executor): Optional figure render pool
 
     Returns:
         dict: Analysis results
@@ -194,33 +242,30 @@ def run_temporal_analysis(routes, report):
 
     # Hourly patterns
     print("  • Analyzing hourly patterns...")
-    hourly_data, peak_hour, viz_files, report_lines = analyze_hourly_patterns(routes)
+    hourly_data, peak_hour, viz_files, report_lines = analyze_hourly_patterns(routes, executor)
     results['hourly'] = {'data': hourly_data, 'peak_hour': peak_hour, 'visualizations': viz_files}
 
     report.add_section("Temporal Analysis")
     report.add_subsection("Hourly Patterns")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
     # Daily patterns
     print("  • Analyzing daily patterns...")
-    daily_data, viz_files, report_lines = analyze_daily_patterns(routes)
+    daily_data, viz_files, report_lines = analyze_daily_patterns(routes, executor)
     results['daily'] = {'data': daily_data, 'visualizations': viz_files}
 
     report.add_subsection("Day of Week Patterns")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
     # Weekend comparison
     print("  • Comparing weekday vs weekend...")
-    viz_files, report_lines = analyze_weekend_comparison(routes)
+    viz_files, report_lines = analyze_weekend_comparison(routes, executor)
     results['weekend'] = {'visualizations': viz_files}
 
     report.add_subsection("Weekend vs Weekday")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
     # Time periods
@@ -229,10 +274,12 @@ def run_temporal_analysis(routes, report):
     results['periods'] = {'stats': period_stats}
 
     report.add_subsection("Time Period Analysis")
-    for line in report_lines:
-        report.add_line(line)
+    report.add_lines(report_lines)
     report.add_line("")
 
+    # Wait for the figures queued on the render pool
+    plotting.resolve_figures(results)
+
     print(f"  ✓ Temporal analysis complete")
 
     return results
@@ -2,8 +2,9 @@
 Analysis Utilities
 ==================
 
-Helper functions for plotting and reporting.
+Helper functions for plotting, reporting and aggregation.
 """
 
 from .plotting import *
 from .reporting import *
+from .aggregation import *
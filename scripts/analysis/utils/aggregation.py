@@ -0,0 +1,165 @@
+"""
+Aggregation Utilities
+=====================
+
+Grouped statistics shared by the analysis modules.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def group_stats(df, by, columns):
+    """
+    Count rows and average numeric columns per group from one GroupBy.
+
+    Args:
+        df (pd.DataFrame): Input dataframe
+        by (str or list): Grouping key(s)
+        columns (list): Numeric columns to average
+
+    Returns:
+        pd.DataFrame: 'count' column followed by one mean column per input column
+    """
+    grouped = df.groupby(by, observed=True)
+    means = grouped[columns].mean()
+    means.insert(0, 'count', grouped.size())
+    return means
+
+
+def top_counts(codes, n=10, minlength=0):
+    """
+    Find the n most frequent non-negative integer codes.
+
+    Counts with np.bincount and selects with np.argpartition, so only the
+    n winners are sorted (O(N + K) instead of sorting all K counts).
+
+    Args:
+        codes (np.ndarray): Integer codes, -1 marks missing values
+        n (int): Number of codes to return
+        minlength (int): Number of possible codes
+
+    Returns:
+        tuple: (codes, counts) ordered by descending count
+    """
+    counts = np.bincount(codes[codes >= 0], minlength=minlength)
+    top = top_indices(counts, n)
+    return top, counts[top]
+
+
+def top_indices(counts, n=10):
+    """
+    Positions of the n largest entries of an array of counts.
+
+    Args:
+        counts (np.ndarray): Counts indexed by code
+        n (int): Number of positions to return
+
+    Returns:
+        np.ndarray: Positions ordered by descending count
+    """
+    if n < counts.size:
+        top = np.argpartition(-counts, n - 1)[:n]
+    else:
+        top = np.arange(counts.size)
+    return top[np.argsort(-counts[top], kind='stable')]
+
+
+def bin_means(codes, values, minlength=0):
+    """
+    Average values per small non-negative integer code with np.bincount.
+
+    NaN values and -1 codes are left out of both the sum and the count,
+    like GroupBy.mean(); codes without any valid value give NaN.
+
+    Args:
+        codes (np.ndarray): Integer codes (e.g. hour of day), -1 marks missing values
+        values (np.ndarray): Values to average
+        minlength (int): Number of possible codes
+
+    Returns:
+        np.ndarray: Mean per code
+    """
+    valid = (codes >= 0) & ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=minlength)
+    counts = np.bincount(codes[valid], minlength=minlength)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def top_categories(series, n=10):
+    """
+    Count the n most frequent values of a categorical Series.
+
+    Equivalent to series.value_counts().head(n), computed on category codes.
+
+    Args:
+        series (pd.Series): Categorical series
+        n (int): Number of values to return
+
+    Returns:
+        pd.Series: Counts named 'count', indexed by category label
+    """
+    categories = series.cat.categories
+    top, counts = top_counts(series.cat.codes.to_numpy(), n, minlength=len(categories))
+    return pd.Series(counts, index=pd.Index(categories[top], name=series.name), name='count')
+
+
+def count_distinct(series):
+    """
+    Count distinct non-missing values, like Series.nunique().
+
+    Categoricals count the used category codes with np.bincount (unused
+    categories, e.g. end-only stations in the shared station set, are not
+    counted); integer columns use np.unique on the raw array.
+
+    Args:
+        series (pd.Series): Input series
+
+    Returns:
+        int: Number of distinct values
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        return int(np.count_nonzero(np.bincount(codes[codes >= 0],
+                                                minlength=len(series.cat.categories))))
+    if pd.api.types.is_integer_dtype(series.dtype) and not series.hasnans:
+        return int(np.unique(series.to_numpy()).size)
+    return series.nunique()
+
+
+def run_bounds(codes):
+    """
+    Locate runs of equal keys in a sorted key array.
+
+    Args:
+        codes (np.ndarray): Sorted integer keys
+
+    Returns:
+        tuple: (first, last) row positions of each run
+    """
+    first = np.flatnonzero(np.concatenate(([len(codes) > 0], codes[1:] != codes[:-1])))
+    last = np.append(first[1:] - 1, len(codes) - 1) if first.size else first
+    return first, last
+
+
+def centered_mean(values, window=3):
+    """
+    Centered moving average, like Series.rolling(window, center=True, min_periods=1).mean().
+
+    Computed from one cumulative sum; the window is clipped at the edges.
+
+    Args:
+        values (np.ndarray): Values without NaN
+        window (int): Odd window length
+
+    Returns:
+        np.ndarray: float64 moving average, same length as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    half = window // 2
+    positions = np.arange(values.shape[0])
+    lo = np.maximum(positions - half, 0)
+    hi = np.minimum(positions + half + 1, values.shape[0])
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    return (sums[hi] - sums[lo]) / (hi - lo)
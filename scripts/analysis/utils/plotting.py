@@ -5,6 +5,10 @@ Plotting Utilities
 Reusable plotting functions for visualizations.
 """
 
+import os
+from concurrent.futures import Future
+import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 from .. import config
@@ -15,30 +19,114 @@ def setup_plot_style():
     plt.style.use(config.PLOT_STYLE)
     sns.set_palette(config.PLOT_PALETTE)
 
+    # Figures are laid out with tight_layout(), so savefig renders once
+    # instead of a measuring pass plus a final pass per file
+    plt.rcParams['savefig.bbox'] = 'standard'
+    plt.rcParams['path.simplify_threshold'] = 1.0
+    plt.rcParams['savefig.dpi'] = config.PLOT_DPI
+    plt.rcParams['agg.path.chunksize'] = 10000
+
+
+def _figure_path(filename, subdirectory=''):
+    """Resolve the output path for a figure."""
+    if subdirectory:
+        output_dir = getattr(config, f'VIZ_{subdirectory.upper()}', config.VIZ_DIR)
+    else:
+        output_dir = config.VIZ_DIR
+    return os.path.join(output_dir, filename)
+
+
+def init_render_worker():
+    """Configure a render worker process like the main process."""
+    matplotlib.use('Agg')
+    setup_plot_style()
+
+
+def _render_and_save(plot_func, filename, subdirectory, args, kwargs):
+    """Build a figure with plot_func and save it."""
+    fig = plot_func(*args, **kwargs)
+    return save_figure(fig, filename, subdirectory)
+
+
+def render_figure(plot_func, filename, subdirectory='', *args, executor=None, **kwargs):
+    """
+    Build a figure with plot_func(*args, **kwargs) and save it.
+
+    With an executor (a ProcessPoolExecutor started with init_render_worker)
+    the work is queued and runs in a worker process; pass only small,
+    already aggregated data. Without one the figure is rendered here.
+
+    Args:
+        plot_func: Module-level function returning a matplotlib figure
+        filename (str): Output filename
+        subdirectory (str): Subdirectory within visualizations folder
+        executor (concurrent.futures.Executor): Optional worker pool
+
+    Returns:
+        concurrent.futures.Future: Resolves to the saved figure path
+    """
+    if executor is not None:
+        return executor.submit(_render_and_save, plot_func, filename, subdirectory, args, kwargs)
+
+    future = Future()
+    future.set_result(_render_and_save(plot_func, filename, subdirectory, args, kwargs))
+    return future
+
+
+def resolve_figures(results):
+    """
+    Wait for the figures queued by render_figure in an analysis' results.
+
+    Each 'visualizations' list is replaced by the saved figure paths;
+    an exception raised in a worker is re-raised here.
+
+    Args:
+        results (dict): Analysis results keyed by sub-analysis
+    """
+    for entry in results.values():
+        if 'visualizations' in entry:
+            entry['visualizations'] = [
+                figure.result() if isinstance(figure, Future) else figure
+                for figure in entry['visualizations']
+            ]
+
 
 def save_figure(fig, filename, subdirectory=''):
     """
     Save figure to file.
 
+    The figure is expected to be laid out already (plt.tight_layout()).
+
     Args:
         fig: Matplotlib figure object
         filename (str): Output filename
         subdirectory (str): Subdirectory within visualizations folder
     """
-    import os
-
-    if subdirectory:
-        output_dir = getattr(config, f'VIZ_{subdirectory.upper()}', config.VIZ_DIR)
-    else:
-        output_dir = config.VIZ_DIR
-
-    filepath = os.path.join(output_dir, filename)
-    fig.savefig(filepath, dpi=config.PLOT_DPI, bbox_inches='tight')
+    filepath = _figure_path(filename, subdirectory)
+    fig.savefig(filepath, dpi=config.PLOT_DPI)
     plt.close(fig)
 
     return filepath
 
 
+def sample_indices(n, max_points=None, seed=0):
+    """
+    Pick row positions to draw when a point cloud is too large to plot.
+
+    Args:
+        n (int): Number of points available
+        max_points (int): Maximum number of points to draw (default: config.MAX_SCATTER_POINTS)
+        seed (int): Random seed so figures are reproducible
+
+    Returns:
+        np.ndarray: Sorted row positions (all rows if n <= max_points)
+    """
+    max_points = max_points or config.MAX_SCATTER_POINTS
+    if n <= max_points:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(seed).choice(n, size=max_points, replace=False))
+
+
 def create_bar_chart(data, title, xlabel, ylabel, color=None, figsize=(12, 6)):
     """
     Create a standard bar chart.
@@ -122,6 +210,79 @@ def create_horizontal_bar_chart(data, title, xlabel, figsize=(12, 8)):
     return fig
 
 
+def draw_histogram(ax, data, bins=50, **kwargs):
+    """
+    Draw a histogram binned with NumPy as a bar chart.
+
+    Args:
+        ax: Matplotlib axes to draw on
+        data: Array-like data (NaNs are ignored)
+        bins (int): Number of bins
+        **kwargs: Passed to ax.bar (color, edgecolor, alpha, ...)
+
+    Returns:
+        tuple: (counts, bin_edges)
+    """
+    # Float input (e.g. float32 columns) is binned as-is, without a float64 copy
+    values = np.asarray(data)
+    if values.dtype.kind != 'f':
+        values = values.astype(np.float64)
+    nan_mask = np.isnan(values)
+    if nan_mask.any():
+        values = values[~nan_mask]
+    counts, edges = np.histogram(values, bins=bins)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **kwargs)
+    return counts, edges
+
+
+def box_stats(data, label=None, whis=1.5):
+    """
+    Compute boxplot statistics for ax.bxp.
+
+    np.percentile selects the quartiles with a partial sort (O(N)) instead
+    of sorting the whole array; whiskers follow matplotlib's Tukey rule.
+
+    Args:
+        data: Array-like data (NaNs are ignored)
+        label (str): Box label
+        whis (float): Whisker reach as a multiple of the IQR
+
+    Returns:
+        dict: Statistics accepted by ax.bxp
+    """
+    values = np.asarray(data, dtype=float)
+    values = values[~np.isnan(values)]
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    return {
+        'label': label,
+        'med': med,
+        'q1': q1,
+        'q3': q3,
+        'whislo': inside.min() if inside.size else q1,
+        'whishi': inside.max() if inside.size else q3,
+        'fliers': values[(values < q1 - whis * iqr) | (values > q3 + whis * iqr)]
+    }
+
+
+def draw_grouped_boxplot(ax, grouped):
+    """
+    Draw one box per group.
+
+    Args:
+        ax: Matplotlib axes to draw on
+        grouped: SeriesGroupBy of the column to summarise
+
+    Returns:
+        list: Box statistics, one dict per group
+    """
+    stats = [box_stats(values, label=str(name)) for name, values in grouped]
+    ax.bxp(stats)
+    return stats
+
+
 def create_histogram(data, title, xlabel, ylabel='Frequency', bins=50, color=None, figsize=(10, 6)):
     """
     Create a histogram with mean and median lines.
@@ -142,7 +303,7 @@ def create_histogram(data, title, xlabel, ylabel='Frequency', bins=50, color=Non
 
     color = color or config.COLORS['primary']
 
-    ax.hist(data, bins=bins, color=color, edgecolor='black', alpha=0.7)
+    draw_histogram(ax, data, bins=bins, color=color, edgecolor='black', alpha=0.7)
     ax.axvline(data.mean(), color='red', linestyle='--', linewidth=2, label='Mean')
     ax.axvline(data.median(), color='green', linestyle='--', linewidth=2, label='Median')
 
@@ -160,6 +321,9 @@ def create_scatter_plot(x, y, title, xlabel, ylabel, figsize=(10, 8)):
     """
     Create a scatter plot with correlation.
 
+    At most config.MAX_SCATTER_POINTS points are drawn; the correlation is
+    computed on the full data.
+
     Args:
         x: X-axis data
         y: Y-axis data
@@ -173,10 +337,12 @@ def create_scatter_plot(x, y, title, xlabel, ylabel, figsize=(10, 8)):
     """
     fig, ax = plt.subplots(figsize=figsize)
 
-    ax.scatter(x, y, alpha=0.3, s=20, c=config.COLORS['primary'], edgecolors='none')
-
-    # Add correlation
+    # Correlation uses every point; only a sample is drawn
     correlation = x.corr(y)
+    idx = sample_indices(len(x))
+    ax.scatter(x.to_numpy()[idx], y.to_numpy()[idx], alpha=0.3, s=20,
+               c=config.COLORS['primary'], edgecolors='none', rasterized=True)
+
     ax.text(0.05, 0.95, f'Correlation: {correlation:.3f}',
             transform=ax.transAxes, fontsize=12,
             verticalalignment='top',
@@ -6,6 +6,7 @@ Functions for generating analysis reports.
 """
 
 from datetime import datetime
+from .aggregation import count_distinct
 
 
 class MarkdownReport:
@@ -39,6 +40,18 @@ class MarkdownReport:
         """Add a line of text."""
         self.lines.append(f"{text}\n")
 
+    def add_lines(self, lines):
+        """
+        Add several lines of text as one pre-joined fragment.
+
+        Output is identical to calling add_line for each line.
+
+        Args:
+            lines (list): Lines of text
+        """
+        if lines:
+            self.lines.append('\n'.join([f"{text}\n" for text in lines]))
+
     def add_bullet(self, text):
         """Add a bullet point."""
         self.lines.append(f"- {text}\n")
@@ -102,8 +115,9 @@ class MarkdownReport:
         Args:
             filepath (str): Output file path
         """
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(self.get_content())
+        # One encoded write, no text-mode newline translation
+        with open(filepath, 'wb', buffering=1 << 20) as f:
+            f.write(self.get_content().encode('utf-8'))
 
         return filepath
 
@@ -143,9 +157,9 @@ def create_summary_dict(routes_df):
         'median_duration': routes_df['duration_minutes_calculated'].median(),
         'avg_distance': routes_df['length'].mean(),
         'median_distance': routes_df['length'].median(),
-        'total_bikes': routes_df['cyclenumber'].nunique(),
-        'total_stations': routes_df['startstationname'].nunique(),
-        'total_memberships': routes_df['Membership'].nunique()
+        'total_bikes': count_distinct(routes_df['cyclenumber']),
+        'total_stations': count_distinct(routes_df['startstationname']),
+        'total_memberships': count_distinct(routes_df['Membership'])
     }
 
     return summary